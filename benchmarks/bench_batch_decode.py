@@ -0,0 +1,38 @@
+# Decode time of dynamic data blocks of many UPS devices, field by field per
+# UPS and with NumPy batch decoding. Registers are read before timing.
+# Run: PYTHONPATH=src python benchmarks/bench_batch_decode.py
+import batch_decode
+from common import best_time, make_ups
+
+UNITS = (100, 1000)
+
+
+def main() -> None:
+    for units in UNITS:
+        upses = [make_ups(seed) for seed in range(units)]
+        registers = [ups.read_block("dynamic") for ups in upses]
+        for ups, block in zip(upses, registers):
+            ups.read_block = lambda _, block=block: block
+
+        def scalar():
+            for ups in upses:
+                ups.fetch_dynamic_data()
+
+        def batch():
+            batch_decode.decode_dynamic_data(upses, registers)
+
+        def batch_decode_only():
+            batch_decode.decode_block(
+                registers, batch_decode.DYNAMIC_DTYPE, batch_decode.DYNAMIC_LAYOUT
+            )
+
+        for name, fn in (
+            ("scalar", scalar),
+            ("batch", batch),
+            ("batch, decode only", batch_decode_only),
+        ):
+            print(f"{units} units, {name}: {best_time(fn) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
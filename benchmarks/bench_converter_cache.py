@@ -0,0 +1,22 @@
+# Allocation and decode time per update cycle with and without converter
+# interning, keeping a history of decoded cycles with constant registers.
+# Run: PYTHONPATH=src python benchmarks/bench_converter_cache.py
+from common import best_time, fetch_cycle, interning, make_ups, retained_bytes
+
+CYCLES = 1000
+
+
+def main() -> None:
+    ups = make_ups()
+    for enabled in (False, True):
+        with interning(enabled):
+            retained = retained_bytes(lambda: fetch_cycle(ups), CYCLES)
+            elapsed = best_time(lambda: fetch_cycle(ups), CYCLES)
+        print(
+            f"interning {'on ' if enabled else 'off'}: "
+            f"{retained:.0f} B retained, {elapsed * 1e6:.0f} us per cycle"
+        )
+
+
+if __name__ == "__main__":
+    main()
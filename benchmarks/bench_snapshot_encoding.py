@@ -0,0 +1,34 @@
+# Message size and encoding time per block, JSON of all fields compared to
+# snapshot JSON and msgpack encodings.
+# Run: PYTHONPATH=src python benchmarks/bench_snapshot_encoding.py
+from dataclasses import asdict
+import json
+import timeit
+
+from common import make_ups
+from snapshot import SnapshotEncoder
+
+
+def main() -> None:
+    ups = make_ups(3)
+    blocks = {
+        "status": ups.fetch_status_data(),
+        "dynamic": ups.fetch_dynamic_data(),
+        "settings": ups.fetch_settings(),
+    }
+    encoders = {
+        "json of all fields": lambda data: json.dumps(asdict(data)),
+        "snapshot json": SnapshotEncoder("json").encode,
+        "snapshot msgpack": SnapshotEncoder("msgpack").encode,
+    }
+    for block, data in blocks.items():
+        for name, encode in encoders.items():
+            elapsed = min(timeit.repeat(lambda: encode(data), number=2000, repeat=5))
+            print(
+                f"{block}, {name}: {len(encode(data))} B, "
+                f"{elapsed / 2000 * 1e6:.0f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Bytes per decoded snapshot (inventory, status, dynamic, settings, commands)
+# kept in a history, with dict backed dataclasses as before the slotted data
+# model, slotted dataclasses, and slotted dataclasses with interning.
+# Run: PYTHONPATH=src python benchmarks/bench_snapshot_memory.py
+from dataclasses import fields, is_dataclass, make_dataclass
+
+from common import fetch_cycle, interning, make_ups, retained_bytes
+
+SNAPSHOTS = 1000
+
+_dict_classes = {}
+
+
+def to_dict_backed(data):
+    # Copy of the data as regular dataclasses with instance __dict__
+    if not is_dataclass(data):
+        return data
+    cls = type(data)
+    if cls not in _dict_classes:
+        _dict_classes[cls] = make_dataclass(
+            cls.__name__, [(f.name, f.type) for f in fields(cls)]
+        )
+    return _dict_classes[cls](
+        **{f.name: to_dict_backed(getattr(data, f.name)) for f in fields(data)}
+    )
+
+
+def main() -> None:
+    ups = make_ups()
+    variants = (
+        ("dict backed", False, lambda: to_dict_backed_snapshot(ups)),
+        ("slotted", False, lambda: snapshot(ups)),
+        ("slotted, interned", True, lambda: snapshot(ups)),
+    )
+    for name, interned, build in variants:
+        with interning(interned):
+            retained = retained_bytes(build, SNAPSHOTS)
+        print(f"{name}: {retained:.0f} B per snapshot")
+
+
+def snapshot(ups) -> tuple:
+    return (ups.inventory_data, *fetch_cycle(ups))
+
+
+def to_dict_backed_snapshot(ups) -> tuple:
+    return tuple(to_dict_backed(data) for data in snapshot(ups))
+
+
+if __name__ == "__main__":
+    main()
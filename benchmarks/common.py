@@ -0,0 +1,87 @@
+from contextlib import contextmanager
+import functools
+import gc
+import logging
+import random
+import time
+import tracemalloc
+
+from apcups import ApcUps
+from apcups_data import Interned
+
+
+class RegisterClient:
+    # Modbus client returning fixed pseudo random registers of one UPS with
+    # main and first switched outlet group present
+    def __init__(self, seed: int = 1, host: str = "127.0.0.1", port: int = 502):
+        rnd = random.Random(seed)  # nosec
+        self.registers = [rnd.randint(0, 0xFFFF) for _ in range(2100)]
+        self.registers[590] = 0b11
+        self.host = host
+        self.port = port
+        self.last_except = 0
+
+    def open(self, **kwargs) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+    def read_holding_registers(self, addr: int, reg_nb: int, **kwargs) -> list[int]:
+        return self.registers[addr : addr + reg_nb]
+
+
+def make_ups(seed: int = 1) -> ApcUps:
+    logger = logging.getLogger("benchmark")
+    logger.setLevel(logging.WARNING)
+    ups = ApcUps("127.0.0.1", logger=logger, client=RegisterClient(seed))
+    ups.fetch_inventory_data()
+    return ups
+
+
+def fetch_cycle(ups: ApcUps) -> tuple:
+    return (
+        ups.fetch_status_data(),
+        ups.fetch_dynamic_data(),
+        ups.fetch_settings(),
+        ups.fetch_commands_data(),
+    )
+
+
+@contextmanager
+def interning(enabled: bool):
+    # Converter instances are interned by raw value, disabling creates a new
+    # instance on every call as before interning
+    for cls in Interned.classes:
+        cls._instances.cache_clear()
+    saved = {cls: cls._instances for cls in Interned.classes}
+    if not enabled:
+        for cls in Interned.classes:
+            cls._instances = functools.partial(type.__call__, cls)
+    try:
+        yield
+    finally:
+        for cls, instances in saved.items():
+            cls._instances = instances
+
+
+def retained_bytes(build, count: int) -> float:
+    # Memory retained per item when keeping count items built by build()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build() for _ in range(count)]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del items
+    return retained / count
+
+
+def best_time(fn, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,85 @@
+import time
+
+
+class AdaptivePollRate:
+    # Polls on every update while the UPS state changes or a power event is
+    # active, and backs off up to max_interval when state has been stable
+    # for stable_time
+    ALERT_STATUSES = ("'OnBattery'", "'InputBad'")
+    STATE_FIELDS = ("ups_status", "input_status")
+    LOAD_FIELD = "output0_real_power_pct"
+    COUNTDOWN_FIELDS = (
+        "_turn_off_countdown",
+        "_turn_on_countdown",
+        "_stay_off_countdown",
+    )
+
+    def __init__(
+        self, max_interval: float, stable_time: float = 300, load_change: float = 10
+    ):
+        self.max_interval = max_interval
+        self.stable_time = stable_time
+        self.load_change = load_change
+        self.states = {}
+        self.loads = {}
+        self.alerts = set()
+        self.last_event = time.monotonic()
+        self.last_poll = None
+
+    def update(self, key: str, value: str) -> None:
+        unit, _, field = key.partition("/")
+        if field in self.STATE_FIELDS:
+            if self.states.get((unit, field), value) != value:
+                self.event()
+            self.states[(unit, field)] = value
+            self._set_alert((unit, field), any(s in value for s in self.ALERT_STATUSES))
+        elif field == self.LOAD_FIELD:
+            load = float(value)
+            previous = self.loads.setdefault(unit, load)
+            if abs(load - previous) >= self.load_change:
+                self.loads[unit] = load
+                self.event()
+        elif field.endswith(self.COUNTDOWN_FIELDS):
+            # Countdown is -1 when not active
+            self._set_alert((unit, field), int(value) >= 0)
+
+    def _set_alert(self, key: tuple[str, str], active: bool) -> None:
+        if active:
+            self.alerts.add(key)
+            self.event()
+        else:
+            self.alerts.discard(key)
+
+    def event(self) -> None:
+        self.last_event = time.monotonic()
+
+    def reset(self) -> None:
+        self.states.clear()
+        self.loads.clear()
+        self.alerts.clear()
+        self.event()
+
+    def get_interval(self, now: float = None) -> float:
+        if self.alerts:
+            return 0
+        now = time.monotonic() if now is None else now
+        # Interval grows with the time stable beyond stable_time
+        stable_for = now - self.last_event - self.stable_time
+        return min(self.max_interval, max(0, stable_for))
+
+    def get_poll_interval(self) -> float:
+        # Interval after the previous poll. It is measured at the poll, so
+        # it grows by the stable time gained on each poll, and a change seen
+        # by the poll brings it back to zero.
+        if self.last_poll is None:
+            return 0
+        return self.get_interval(self.last_poll)
+
+    def should_poll(self, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if self.last_poll is None:
+            return True
+        return now - self.last_poll >= self.get_poll_interval()
+
+    def polled(self, now: float = None) -> None:
+        self.last_poll = time.monotonic() if now is None else now
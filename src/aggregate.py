@@ -0,0 +1,90 @@
+import operator
+from typing import Iterable
+
+
+class Aggregate:
+    # Site wide aggregate of one field over all UPS devices, updated
+    # incrementally when the value of a single device changes
+    OPERATIONS = ("sum", "min", "max", "count")
+
+    def __init__(self, op: str, field: str, match: str = None):
+        if op not in self.OPERATIONS:
+            raise ValueError(f"Unknown aggregate operation '{op}'")
+        if op == "count" and not match:
+            raise ValueError(f"count aggregate of '{field}' requires a match value")
+        self.op = op
+        self.field = field
+        self.match = match
+        self.name = f"{field}_{match}_{op}" if match else f"{field}_{op}"
+        self.values = {}
+        self.value = None
+        self._better = operator.lt if op == "min" else operator.gt
+
+    def _convert(self, value: str) -> float | None:
+        if self.op == "count":
+            return 1 if f"'{self.match}'" in value or value == self.match else 0
+        try:
+            return float(value)
+        except ValueError:
+            return None
+
+    def update(self, unit: str, value: str) -> bool:
+        return self._replace(unit, self._convert(value))
+
+    def remove(self, unit: str) -> bool:
+        return self._replace(unit, None)
+
+    def _replace(self, unit: str, new: float | None) -> bool:
+        old = self.values.get(unit)
+        if new == old:
+            return False
+        if new is None:
+            del self.values[unit]
+        else:
+            self.values[unit] = new
+
+        previous = self.value
+        if self.op in ("sum", "count"):
+            self.value = (self.value or 0) - (old or 0) + (new or 0)
+        elif new is not None and (self.value is None or self._better(new, self.value)):
+            self.value = new
+        elif old is not None and old == self.value:
+            # Current extreme was replaced by a worse value, find the next one
+            fn = min if self.op == "min" else max
+            self.value = fn(self.values.values(), default=None)
+        return self.value != previous
+
+
+class SiteAggregator:
+    def __init__(self, aggregates: list[Aggregate]):
+        self.aggregates = aggregates
+        self.by_field = {}
+        for aggregate in aggregates:
+            self.by_field.setdefault(aggregate.field, []).append(aggregate)
+
+    @classmethod
+    def parse(cls, spec: str) -> "SiteAggregator":
+        # Format: <op>:<field>[=<match>],...
+        # e.g. "sum:output0_real_power_w,count:ups_status=OnBattery"
+        aggregates = []
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            op, _, field = item.strip().partition(":")
+            field, _, match = field.partition("=")
+            aggregates.append(Aggregate(op.strip(), field.strip(), match.strip()))
+        return cls(aggregates)
+
+    def update(self, key: str, value: str) -> None:
+        unit, _, field = key.partition("/")
+        for aggregate in self.by_field.get(field, ()):
+            aggregate.update(unit, value)
+
+    def remove(self, unit: str, fields: Iterable[str] = None) -> None:
+        # Removes values of the unit, all or only the given fields
+        for field in self.by_field if fields is None else fields:
+            for aggregate in self.by_field.get(field, ()):
+                aggregate.remove(unit)
+
+    def get_values(self) -> dict[str, float]:
+        return {a.name: a.value for a in self.aggregates}
@@ -1,4 +1,7 @@
+from dataclasses import fields, replace
+import inspect
 import logging
+import time
 from apcups_data import (
     BatteryLifeTimeStatus,
     BatterySystemError,
@@ -6,6 +9,7 @@ from apcups_data import (
     CommandsData,
     CommunicationError,
     Date,
+    DeadlineExceededError,
     DynamicData,
     GeneralError,
     InputEfficiency,
@@ -26,15 +30,108 @@ from apcups_data import (
     StatusData,
     UpsStatus,
     UpsStatusChangeCause,
+    UnsupportedRegistersError,
     Upsdommand,
     UserInterfaceCommand,
     UserInterfaceStatus,
     VerificationData,
     VoltageAcSetting,
 )
+from field_filter import FieldFilter
+from gateway import format_target
+from tracing import Tracer
 from pyModbusTCP.client import ModbusClient
 from pymodbus.payload import BinaryPayloadDecoder
 from pymodbus.constants import Endian
+from pyModbusTCP.constants import EXP_DATA_ADDRESS
+
+# Register ranges of the data blocks read on every update
+BLOCK_REGISTERS = {
+    "status": (0, 27),
+    "settings": (1024, 50),
+    "dynamic": (128, 54),
+    "commands": (1536, 24),
+}
+
+# First register and number of registers of each field in the data blocks
+REGISTER_MAP = {
+    "ups_status": (0, 2),
+    "ups_status_change_cause": (2, 1),
+    "simple_signaling_status": (18, 1),
+    "general_error": (19, 1),
+    "power_system_error": (20, 2),
+    "battery_system_error": (22, 1),
+    "replace_battery_test_status": (23, 1),
+    "runtime_calibration_status": (24, 1),
+    "battery_life_time_status": (25, 1),
+    "user_interface_status": (26, 1),
+    "runtime_remaining_s": (128, 2),
+    "runtime_remaining_min": (128, 2),
+    "state_of_charge_pct": (130, 1),
+    "battery_positive_voltage_dc": (131, 1),
+    "battery_negative_voltage_dc": (132, 1),
+    "battery_replacement_date": (133, 1),
+    "battery_temperature": (135, 1),
+    "output0_real_power_pct": (136, 1),
+    "output0_real_power_w": (136, 1),
+    "output0_apparent_power_pct": (138, 1),
+    "output0_apparent_power_va": (138, 1),
+    "output0_current_ac": (140, 1),
+    "output0_voltage_ac": (142, 1),
+    "output_frequency": (144, 1),
+    "output_energy_kwh": (145, 2),
+    "input_status": (150, 1),
+    "input0_voltage_ac": (151, 1),
+    "input_efficiency": (154, 1),
+    "battery_test_interval_setting": (1024, 1),
+    "output_upper_acceptable_voltage_setting": (1026, 1),
+    "output_lower_acceptable_voltage_setting": (1027, 1),
+    "output_sensitivity_setting": (1028, 1),
+    "ups_command": (1536, 2),
+    "outlet_command": (1538, 2),
+    "simple_signaling_command": (1540, 1),
+    "replace_battery_test_command": (1541, 1),
+    "run_time_calibration_command": (1542, 1),
+    "user_interface_command": (1543, 1),
+}
+for i, group in enumerate(("mog", "sog0", "sog1", "sog2", "sog3")):
+    REGISTER_MAP[f"{group}_outlet_status"] = (3 + 3 * i, 2)
+    REGISTER_MAP[f"{group}_turn_off_countdown"] = (155 + 4 * i, 1)
+    REGISTER_MAP[f"{group}_turn_on_countdown"] = (156 + 4 * i, 1)
+    REGISTER_MAP[f"{group}_stay_off_countdown"] = (157 + 4 * i, 2)
+    REGISTER_MAP[f"{group}_turn_off_countdown_setting"] = (1029 + 5 * i, 1)
+    REGISTER_MAP[f"{group}_turn_on_countdown_setting"] = (1030 + 5 * i, 1)
+    REGISTER_MAP[f"{group}_stay_off_countdown_setting"] = (1031 + 5 * i, 2)
+    REGISTER_MAP[f"{group}_minimum_return_runtime_setting"] = (1033 + 5 * i, 1)
+
+# Unsigned fields, which read as 0xFFFF when the field is not supported by
+# the UPS model. Signed fields are not probed because -1 is a valid value
+# e.g. for countdowns.
+PROBED_FIELDS = (
+    "runtime_remaining_s",
+    "runtime_remaining_min",
+    "state_of_charge_pct",
+    "battery_replacement_date",
+    "output0_real_power_pct",
+    "output0_real_power_w",
+    "output0_apparent_power_pct",
+    "output0_apparent_power_va",
+    "output0_current_ac",
+    "output0_voltage_ac",
+    "output_frequency",
+    "output_energy_kwh",
+    "input_status",
+    "input0_voltage_ac",
+    "battery_test_interval_setting",
+    "output_upper_acceptable_voltage_setting",
+    "output_lower_acceptable_voltage_setting",
+    "output_sensitivity_setting",
+    "mog_minimum_return_runtime_setting",
+    "sog0_minimum_return_runtime_setting",
+    "sog1_minimum_return_runtime_setting",
+    "sog2_minimum_return_runtime_setting",
+    "sog3_minimum_return_runtime_setting",
+)
 
 
 class ApcUps:
@@ -42,16 +139,23 @@ class ApcUps:
         self,
         host: str,
         port: int = 502,
+        unit_id: int = 1,
         auto_open=True,
         auto_close=False,
         debug: bool = False,
         logger=None,
+        tracer: Tracer = None,
+        client=None,
+        field_filter: FieldFilter = None,
     ):
         self.logger = logger or logging.getLogger(__name__)
-        self.client = ModbusClient(
+        self.tracer = tracer or Tracer()
+        self.field_filter = field_filter
+        self.name = format_target(host, port, unit_id)
+        self.client = client or ModbusClient(
             host=host,
             port=port,
-            unit_id=1,
+            unit_id=unit_id,
             auto_open=auto_open,
             auto_close=auto_close,
             debug=debug,
@@ -66,17 +170,52 @@ class ApcUps:
         self.sog1_present = False
         self.sog2_present = False
         self.sog3_present = False
+        self.register_support = None
+        self.unsupported_blocks = frozenset()
+        self.unsupported_fields = frozenset()
+        self._read_ranges = {}
+        # Monotonic time by which the current update cycle must be done
+        self.deadline = None
+        # GatewayUnitClient takes a timeout per request, ModbusClient does not
+        self._timeout_supported = (
+            "timeout"
+            in inspect.signature(self.client.read_holding_registers).parameters
+        )
+
+    def _get_timeout_kwargs(self, action: str) -> dict:
+        # Timeout of a single request is the time remaining until deadline
+        if self.deadline is None:
+            return {}
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError(f"Cycle deadline exceeded before {action}")
+        return {"timeout": remaining} if self._timeout_supported else {}
 
     def open_connection(self) -> None:
-        self.client.open()
+        kwargs = self._get_timeout_kwargs("connect")
+        if not self.client.open(**kwargs):
+            raise CommunicationError(
+                f"Failed to connect {self.client.host}:{self.client.port}"
+            )
 
     def close_connection(self) -> None:
         self.client.close()
 
     def _fetch_data(self, addr: int, reg_nb: int) -> list[int] | None:
-        if result := self.client.read_holding_registers(addr, reg_nb):
+        kwargs = self._get_timeout_kwargs(f"reading address {addr}")
+        with self.tracer.span(f"read {addr}+{reg_nb}"):
+            result = self.client.read_holding_registers(addr, reg_nb, **kwargs)
+        if result:
             self.logger.debug(f"addr: {addr}, reg_nb: {reg_nb}, result: {result}")
             return result
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceededError(
+                f"Cycle deadline exceeded while reading address {addr}"
+            )
+        if getattr(self.client, "last_except", None) == EXP_DATA_ADDRESS:
+            raise UnsupportedRegistersError(
+                f"{reg_nb} regs from address {addr} not supported"
+            )
         raise CommunicationError(f"Failed to fetch {reg_nb} regs from address {addr}")
 
     def _convert_to_str(self, val: str) -> str:
@@ -117,11 +256,7 @@ class ApcUps:
 
         output_voltage_ac_setting = VoltageAcSetting(output_voltage_ac_setting_bf)
         sog_relay_config_setting = SogRelayConfig(sog_relay_config_setting_bf)
-        self.mog_present = sog_relay_config_setting.mog_presents
-        self.sog0_present = sog_relay_config_setting.sog0_presents
-        self.sog1_present = sog_relay_config_setting.sog1_presents
-        self.sog2_present = sog_relay_config_setting.sog2_presents
-        self.sog3_present = sog_relay_config_setting.sog3_presents
+        self._set_outlet_groups(sog_relay_config_setting)
 
         self.inventory_data = InventoryData(
             fw_version=fw_version,
@@ -144,11 +279,173 @@ class ApcUps:
         )
         return self.inventory_data
 
+    def _set_outlet_groups(self, sog_relay_config_setting: SogRelayConfig) -> None:
+        self.mog_present = sog_relay_config_setting.mog_presents
+        self.sog0_present = sog_relay_config_setting.sog0_presents
+        self.sog1_present = sog_relay_config_setting.sog1_presents
+        self.sog2_present = sog_relay_config_setting.sog2_presents
+        self.sog3_present = sog_relay_config_setting.sog3_presents
+
+    def get_capabilities(self) -> dict:
+        return {
+            "mog_present": self.mog_present,
+            "sog0_present": self.sog0_present,
+            "sog1_present": self.sog1_present,
+            "sog2_present": self.sog2_present,
+            "sog3_present": self.sog3_present,
+        }
+
+    def probe_register_support(self, blocks: list[str] = None) -> dict:
+        # Blocks failing with other errors than unsupported registers are
+        # listed as unknown and read as supported until probed again
+        modbus_map_id = None
+        if blocks is None:
+            blocks = list(BLOCK_REGISTERS)
+            try:
+                verification_data = self.fetch_verification_data()
+                modbus_map_id = self._convert_to_str(verification_data.modbus_map_ID)
+            except DeadlineExceededError:
+                raise
+            except CommunicationError as e:
+                self.logger.warning(f"{self.name}: Modbus map ID read failed: {e}")
+
+        unsupported = []
+        unknown = []
+        fields = []
+        for block in blocks:
+            addr, reg_nb = BLOCK_REGISTERS[block]
+            try:
+                registers = self._fetch_data(addr, reg_nb)
+            except UnsupportedRegistersError:
+                unsupported.append(block)
+                continue
+            except DeadlineExceededError:
+                raise
+            except CommunicationError as e:
+                self.logger.warning(f"{self.name}: {block} probe failed: {e}")
+                unknown.append(block)
+                continue
+            for field in PROBED_FIELDS:
+                field_addr, field_reg_nb = REGISTER_MAP[field]
+                offset = field_addr - addr
+                if 0 <= offset < reg_nb and all(
+                    r == 0xFFFF for r in registers[offset : offset + field_reg_nb]
+                ):
+                    fields.append(field)
+        return {
+            "modbus_map_id": modbus_map_id,
+            "blocks": unsupported,
+            "fields": fields,
+            "unknown": unknown,
+        }
+
+    def set_register_support(self, register_support: dict | None) -> None:
+        self.register_support = register_support
+        self.unsupported_blocks = frozenset(
+            register_support["blocks"] if register_support else ()
+        )
+        self.unsupported_fields = frozenset(
+            register_support["fields"] if register_support else ()
+        )
+        self._read_ranges.clear()
+
+    def wants_field(self, field: str) -> bool:
+        if field in self.unsupported_fields:
+            return False
+        return self.field_filter is None or self.field_filter.matches(field)
+
+    def reads_block(self, block: str) -> bool:
+        return block not in self.unsupported_blocks and (
+            self._get_read_range(block) is not None
+        )
+
+    def _get_read_range(self, block: str) -> tuple[int, int] | None:
+        # Registers of the selected fields of the block, or None if no field
+        # of the block is selected
+        if block not in self._read_ranges:
+            addr, reg_nb = BLOCK_REGISTERS[block]
+            read_range = (addr, reg_nb)
+            if self.field_filter is not None:
+                ranges = [
+                    (field_addr, field_addr + field_reg_nb)
+                    for field, (field_addr, field_reg_nb) in REGISTER_MAP.items()
+                    if addr <= field_addr < addr + reg_nb and self.wants_field(field)
+                ]
+                read_range = None
+                if ranges:
+                    start = min(r[0] for r in ranges)
+                    read_range = (start, max(r[1] for r in ranges) - start)
+            self._read_ranges[block] = read_range
+        return self._read_ranges[block]
+
+    def read_block(self, block: str) -> list[int]:
+        # Registers outside the read range are decoded as zeros, fields using
+        # them are not selected and are set to None
+        addr, reg_nb = BLOCK_REGISTERS[block]
+        start, count = self._get_read_range(block) or (addr, 0)
+        result = self._fetch_data(start, count) if count else []
+        registers = [0] * (start - addr) + result
+        return registers + [0] * (reg_nb - len(registers))
+
+    def _get_block_decoder(self, block: str) -> BinaryPayloadDecoder:
+        return BinaryPayloadDecoder.fromRegisters(
+            self.read_block(block), byteorder=Endian.Big
+        )
+
+    def select_fields(self, data):
+        # Copy of the data with fields not selected set to None
+        if self.field_filter is None:
+            return data
+        return replace(
+            data,
+            **{f.name: None for f in fields(data) if not self.wants_field(f.name)},
+        )
+
+    def _convert(self, field: str, cls, raw: int):
+        return cls(raw) if self.wants_field(field) else None
+
+    def fetch_serial_number(self) -> str:
+        decoder = self._get_data_as_decoder(564, 8)
+        return self._convert_to_str(decoder.decode_string(16))  # 564
+
+    def restore_inventory_data(
+        self, inventory: dict, capabilities: dict
+    ) -> InventoryData | None:
+        serial_number = self.fetch_serial_number()
+        if serial_number != inventory["serial_number"]:
+            self.logger.info(
+                f"Cached serial number {inventory['serial_number']} "
+                f"does not match {serial_number}"
+            )
+            return None
+
+        self.inventory_data = InventoryData(
+            **{
+                **inventory,
+                "manufcturing_date": Date(inventory["manufcturing_date"]["raw"]),
+                "battery_installation_date": Date(
+                    inventory["battery_installation_date"]["raw"]
+                ),
+                "output_voltage_ac_setting": VoltageAcSetting(
+                    inventory["output_voltage_ac_setting"]["raw"]
+                ),
+                "sog_relay_config_setting": SogRelayConfig(
+                    inventory["sog_relay_config_setting"]["raw"]
+                ),
+            }
+        )
+        self.mog_present = capabilities["mog_present"]
+        self.sog0_present = capabilities["sog0_present"]
+        self.sog1_present = capabilities["sog1_present"]
+        self.sog2_present = capabilities["sog2_present"]
+        self.sog3_present = capabilities["sog3_present"]
+        return self.inventory_data
+
     def fetch_status_data(self) -> StatusData:
         if self.inventory_data is None:
             self.fetch_inventory_data()
 
-        decoder = self._get_data_as_decoder(0, 27)
+        decoder = self._get_block_decoder("status")
         ups_status_bf = decoder.decode_32bit_uint()  # 0
         ups_status_change_cause_bf = decoder.decode_16bit_uint()  # 2
         mog_outlet_status_bf = decoder.decode_32bit_uint()  # 3
@@ -170,41 +467,69 @@ class ApcUps:
         battery_life_time_status_bf = decoder.decode_16bit_uint()  # 25
         user_interface_status_bf = decoder.decode_16bit_uint()  # 26
 
-        ups_status = UpsStatus(ups_status_bf)
-        ups_status_change_cause = UpsStatusChangeCause(ups_status_change_cause_bf)
+        ups_status = self._convert("ups_status", UpsStatus, ups_status_bf)
+        ups_status_change_cause = self._convert(
+            "ups_status_change_cause", UpsStatusChangeCause, ups_status_change_cause_bf
+        )
 
         mog_outlet_status = None
         if self.mog_present:
-            mog_outlet_status = OutletStatus(mog_outlet_status_bf)
+            mog_outlet_status = self._convert(
+                "mog_outlet_status", OutletStatus, mog_outlet_status_bf
+            )
 
         sog0_outlet_status = None
         if self.sog0_present:
-            sog0_outlet_status = OutletStatus(sog0_outlet_status_bf)
+            sog0_outlet_status = self._convert(
+                "sog0_outlet_status", OutletStatus, sog0_outlet_status_bf
+            )
 
         sog1_outlet_status = None
         if self.sog1_present:
-            sog1_outlet_status = OutletStatus(sog1_outlet_status_bf)
+            sog1_outlet_status = self._convert(
+                "sog1_outlet_status", OutletStatus, sog1_outlet_status_bf
+            )
 
         sog2_outlet_status = None
         if self.sog2_present:
-            sog2_outlet_status = OutletStatus(sog2_outlet_status_bf)
+            sog2_outlet_status = self._convert(
+                "sog2_outlet_status", OutletStatus, sog2_outlet_status_bf
+            )
 
         sog3_outlet_status = None
         if self.sog3_present:
-            sog3_outlet_status = OutletStatus(sog3_outlet_status_bf)
+            sog3_outlet_status = self._convert(
+                "sog3_outlet_status", OutletStatus, sog3_outlet_status_bf
+            )
 
-        simple_signaling_status = SimpleSignalingStatus(simple_signaling_status_bf)
-        general_error = GeneralError(general_error_bf)
-        power_system_error = PowerSystemError(power_system_error_bf)
-        battery_system_error = BatterySystemError(battery_system_error_bf)
-        replace_battery_test_status = ReplaceBatteryTestStatus(
-            replace_battery_test_status_bf
+        simple_signaling_status = self._convert(
+            "simple_signaling_status", SimpleSignalingStatus, simple_signaling_status_bf
+        )
+        general_error = self._convert("general_error", GeneralError, general_error_bf)
+        power_system_error = self._convert(
+            "power_system_error", PowerSystemError, power_system_error_bf
+        )
+        battery_system_error = self._convert(
+            "battery_system_error", BatterySystemError, battery_system_error_bf
+        )
+        replace_battery_test_status = self._convert(
+            "replace_battery_test_status",
+            ReplaceBatteryTestStatus,
+            replace_battery_test_status_bf,
+        )
+        runtime_calibration_status = self._convert(
+            "runtime_calibration_status",
+            RuntimeCalibrationStatus,
+            runtime_calibration_status_bf,
         )
-        runtime_calibration_status = RuntimeCalibrationStatus(
-            runtime_calibration_status_bf
+        battery_life_time_status = self._convert(
+            "battery_life_time_status",
+            BatteryLifeTimeStatus,
+            battery_life_time_status_bf,
+        )
+        user_interface_status = self._convert(
+            "user_interface_status", UserInterfaceStatus, user_interface_status_bf
         )
-        battery_life_time_status = BatteryLifeTimeStatus(battery_life_time_status_bf)
-        user_interface_status = UserInterfaceStatus(user_interface_status_bf)
 
         return StatusData(
             ups_status_change_cause=ups_status_change_cause,
@@ -228,7 +553,7 @@ class ApcUps:
         if self.inventory_data is None:
             self.fetch_inventory_data()
 
-        decoder = self._get_data_as_decoder(128, 54)
+        decoder = self._get_block_decoder("dynamic")
         runtime_remaining_s = decoder.decode_32bit_uint()  # 128
         state_of_charge_pct = decoder.decode_16bit_uint() / 512  # 130
         battery_positive_voltage_dc = decoder.decode_16bit_int() / 32  # 131
@@ -267,21 +592,12 @@ class ApcUps:
         sog3_turn_on_countdown = decoder.decode_16bit_int()  # 172
         sog3_stay_off_countdown = decoder.decode_32bit_int()  # 173
 
-        input_status = InputStatus(input_status_bf)
-        runtime_remaining_min = runtime_remaining_s / 60
-        battery_replacement_date = Date(battery_replacement_date_int)
-        output0_apparent_power_va = self._calculate_apparent_power(
-            output0_apparent_power_pct
-        )
-        output0_real_power_w = self._calculate_real_power(output0_real_power_pct)
-        input_efficiency = InputEfficiency(input_efficiency_raw)
-
-        self.dynamic_data = DynamicData(
+        return self.create_dynamic_data(
             runtime_remaining_s=runtime_remaining_s,
             state_of_charge_pct=state_of_charge_pct,
             battery_positive_voltage_dc=battery_positive_voltage_dc,
             battery_negative_voltage_dc=battery_negative_voltage_dc,
-            battery_replacement_date=battery_replacement_date,
+            battery_replacement_date_int=battery_replacement_date_int,
             battery_temperature=battery_temperature,
             output0_real_power_pct=output0_real_power_pct,
             output0_apparent_power_pct=output0_apparent_power_pct,
@@ -289,8 +605,9 @@ class ApcUps:
             output0_voltage_ac=output0_voltage_ac,
             output_frequency=output_frequency,
             output_energy_kwh=output_energy_kwh,
+            input_status_bf=input_status_bf,
             input0_voltage_ac=input0_voltage_ac,
-            input_efficiency=input_efficiency,
+            input_efficiency_raw=input_efficiency_raw,
             mog_turn_off_countdown=mog_turn_off_countdown,
             mog_turn_on_countdown=mog_turn_on_countdown,
             mog_stay_off_countdown=mog_stay_off_countdown,
@@ -306,40 +623,55 @@ class ApcUps:
             sog3_turn_off_countdown=sog3_turn_off_countdown,
             sog3_turn_on_countdown=sog3_turn_on_countdown,
             sog3_stay_off_countdown=sog3_stay_off_countdown,
-            output0_apparent_power_va=output0_apparent_power_va,
-            output0_real_power_w=output0_real_power_w,
-            input_status=input_status,
-            runtime_remaining_min=runtime_remaining_min,
         )
-        self._set_dynamic_data_sogs(self.dynamic_data)
+
+    def create_dynamic_data(
+        self,
+        input_status_bf: int,
+        battery_replacement_date_int: int,
+        input_efficiency_raw: int,
+        **values,
+    ) -> DynamicData:
+        # Values are decoded and scaled registers of the dynamic data block
+        self.dynamic_data = self._create_data(
+            DynamicData,
+            ("turn_off_countdown", "turn_on_countdown", "stay_off_countdown"),
+            input_status=self._convert("input_status", InputStatus, input_status_bf),
+            battery_replacement_date=self._convert(
+                "battery_replacement_date", Date, battery_replacement_date_int
+            ),
+            input_efficiency=self._convert(
+                "input_efficiency", InputEfficiency, input_efficiency_raw
+            ),
+            output0_apparent_power_va=self._calculate_apparent_power(
+                values["output0_apparent_power_pct"]
+            ),
+            output0_real_power_w=self._calculate_real_power(
+                values["output0_real_power_pct"]
+            ),
+            runtime_remaining_min=values["runtime_remaining_s"] / 60,
+            **values,
+        )
         return self.dynamic_data
 
-    def _set_dynamic_data_sogs(self, data: DynamicData) -> DynamicData:
-        if self.mog_present is False:
-            data.mog_turn_off_countdown = None
-            data.mog_turn_on_countdown = None
-            data.mog_stay_off_countdown = None
-
-        if self.sog0_present is False:
-            data.sog0_turn_off_countdown = None
-            data.sog0_turn_on_countdown = None
-            data.sog0_stay_off_countdown = None
-
-        if self.sog1_present is False:
-            data.sog1_turn_off_countdown = None
-            data.sog1_turn_on_countdown = None
-            data.sog1_stay_off_countdown = None
-
-        if self.sog2_present is False:
-            data.sog2_turn_off_countdown = None
-            data.sog2_turn_on_countdown = None
-            data.sog2_stay_off_countdown = None
-
-        if self.sog3_present is False:
-            data.sog3_turn_off_countdown = None
-            data.sog3_turn_on_countdown = None
-            data.sog3_stay_off_countdown = None
-        return data
+    def _create_data(self, cls, outlet_group_fields: tuple[str, ...], **values):
+        # Fields of outlet groups not present in the UPS and fields not
+        # supported by the UPS model or not selected are set to None
+        for field in values:
+            if not self.wants_field(field):
+                values[field] = None
+        groups = {
+            "mog": self.mog_present,
+            "sog0": self.sog0_present,
+            "sog1": self.sog1_present,
+            "sog2": self.sog2_present,
+            "sog3": self.sog3_present,
+        }
+        for group, present in groups.items():
+            if present is False:
+                for field in outlet_group_fields:
+                    values[f"{group}_{field}"] = None
+        return cls(**values)
 
     def _calculate_apparent_power(self, output0_apparent_power_pct: float) -> float:
         return (
@@ -357,7 +689,7 @@ class ApcUps:
         if self.inventory_data is None:
             self.fetch_inventory_data()
 
-        decoder = self._get_data_as_decoder(1024, 50)
+        decoder = self._get_block_decoder("settings")
         battery_test_interval_setting_bf = decoder.decode_16bit_uint()  # 1024
         decoder.skip_bytes(2)  # 1025
         output_upper_acceptable_voltage_setting = decoder.decode_16bit_uint()  # 1026
@@ -384,15 +716,26 @@ class ApcUps:
         sog3_stay_off_countdown_setting = decoder.decode_32bit_int()  # 1051
         sog3_minimum_return_runtime_setting = decoder.decode_16bit_uint()  # 1053
 
-        battery_test_interval_setting = BatteryTestIntervalSetting(
-            battery_test_interval_setting_bf
+        battery_test_interval_setting = self._convert(
+            "battery_test_interval_setting",
+            BatteryTestIntervalSetting,
+            battery_test_interval_setting_bf,
         )
 
-        output_sensitivity_setting = OutputSensitivitySetting(
-            output_sensitivity_setting_bf
+        output_sensitivity_setting = self._convert(
+            "output_sensitivity_setting",
+            OutputSensitivitySetting,
+            output_sensitivity_setting_bf,
         )
 
-        self.static_data = Settings(
+        self.static_data = self._create_data(
+            Settings,
+            (
+                "turn_off_countdown_setting",
+                "turn_on_countdown_setting",
+                "stay_off_countdown_setting",
+                "minimum_return_runtime_setting",
+            ),
             output_upper_acceptable_voltage_setting=output_upper_acceptable_voltage_setting,
             output_lower_acceptable_voltage_setting=output_lower_acceptable_voltage_setting,
             mog_turn_off_countdown_setting=mog_turn_off_countdown_setting,
@@ -418,45 +761,10 @@ class ApcUps:
             battery_test_interval_setting=battery_test_interval_setting,
             output_sensitivity_setting=output_sensitivity_setting,
         )
-        self._set_settings_sogs(self.static_data)
         return self.static_data
 
-    def _set_settings_sogs(self, data: Settings) -> Settings:
-        if self.mog_present is False:
-            data.mog_turn_off_countdown_setting = None
-            data.mog_turn_on_countdown_setting = None
-            data.mog_stay_off_countdown_setting = None
-            data.mog_minimum_return_runtime_setting = None
-
-        if self.sog0_present is False:
-            data.sog0_turn_off_countdown_setting = None
-            data.sog0_turn_on_countdown_setting = None
-            data.sog0_stay_off_countdown_setting = None
-            data.sog0_minimum_return_runtime_setting = None
-
-        if self.sog1_present is False:
-            data.sog1_turn_off_countdown_setting = None
-            data.sog1_turn_on_countdown_setting = None
-            data.sog1_stay_off_countdown_setting = None
-            data.sog1_minimum_return_runtime_setting = None
-
-        if self.sog2_present is False:
-            data.sog2_turn_off_countdown_setting = None
-            data.sog2_turn_on_countdown_setting = None
-            data.sog2_stay_off_countdown_setting = None
-            data.sog2_minimum_return_runtime_setting = None
-
-        if self.sog3_present is False:
-            data.sog3_turn_off_countdown_setting = None
-            data.sog3_turn_on_countdown_setting = None
-            data.sog3_stay_off_countdown_setting = None
-            data.sog3_minimum_return_runtime_setting = None
-
-        return data
-
     def fetch_commands_data(self) -> CommandsData:
-        result = self._fetch_data(1536, 24)
-        decoder = BinaryPayloadDecoder.fromRegisters(result, byteorder=Endian.Big)
+        decoder = self._get_block_decoder("commands")
 
         ups_command_bf = decoder.decode_32bit_uint()  # 1536
         outlet_command_bf = decoder.decode_32bit_uint()  # 1538
@@ -465,16 +773,28 @@ class ApcUps:
         run_time_calibration_command_bf = decoder.decode_16bit_uint()  # 1542
         user_interface_command_bf = decoder.decode_16bit_uint()  # 1543
 
-        ups_command = Upsdommand(ups_command_bf)
-        outlet_command = OutletCommand(outlet_command_bf)
-        simple_signaling_command = SimpleSignalingCommand(simple_signaling_command_bf)
-        replace_battery_test_command = ReplaceBatteryTestCommand(
-            replace_battery_test_command_bf
+        ups_command = self._convert("ups_command", Upsdommand, ups_command_bf)
+        outlet_command = self._convert(
+            "outlet_command", OutletCommand, outlet_command_bf
+        )
+        simple_signaling_command = self._convert(
+            "simple_signaling_command",
+            SimpleSignalingCommand,
+            simple_signaling_command_bf,
+        )
+        replace_battery_test_command = self._convert(
+            "replace_battery_test_command",
+            ReplaceBatteryTestCommand,
+            replace_battery_test_command_bf,
+        )
+        run_time_calibration_command = self._convert(
+            "run_time_calibration_command",
+            RuntimeCalibrationCommand,
+            run_time_calibration_command_bf,
         )
-        run_time_calibration_command = RuntimeCalibrationCommand(
-            run_time_calibration_command_bf
+        user_interface_command = self._convert(
+            "user_interface_command", UserInterfaceCommand, user_interface_command_bf
         )
-        user_interface_command = UserInterfaceCommand(user_interface_command_bf)
 
         return CommandsData(
             ups_command=ups_command,
@@ -485,7 +805,7 @@ class ApcUps:
             user_interface_command=user_interface_command,
         )
 
-    def fetch_verification_data(self) -> dict:
+    def fetch_verification_data(self) -> VerificationData:
         result = self._fetch_data(2048, 28)
         decoder = BinaryPayloadDecoder.fromRegisters(result, byteorder=Endian.Big)
 
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+import fcntl
+import json
+import logging
+import os
+
+
+class InventoryCache:
+    def __init__(self, filename: str, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.filename = filename
+
+    def _read(self) -> dict:
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Failed to read cache file {self.filename}: {e}")
+            return {}
+
+    def _write(self, data: dict) -> None:
+        tmpfile = f"{self.filename}.{os.getpid()}.tmp"
+        try:
+            with open(tmpfile, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmpfile, self.filename)
+        except OSError as e:
+            self.logger.warning(f"Failed to write cache file {self.filename}: {e}")
+
+    @contextmanager
+    def _lock(self):
+        # Fleet workers share the cache file, updates are serialized with a
+        # lock file so that workers do not overwrite each other's entries
+        try:
+            f = open(f"{self.filename}.lock", "a")
+        except OSError as e:
+            self.logger.warning(f"Failed to lock cache file {self.filename}: {e}")
+            yield
+            return
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def load(self, key: str) -> dict | None:
+        return self._read().get(key)
+
+    def save(self, key: str, value: dict) -> None:
+        with self._lock():
+            data = self._read()
+            data[key] = value
+            self._write(data)
+
+    def remove(self, key: str) -> None:
+        with self._lock():
+            data = self._read()
+            if data.pop(key, None) is not None:
+                self._write(data)
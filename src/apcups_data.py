@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 import datetime
+import functools
 from typing import Optional
 
 
@@ -7,13 +8,43 @@ class CommunicationError(Exception):
     ...
 
 
-@dataclass
-class Date:
+class UnsupportedRegistersError(CommunicationError):
+    ...
+
+
+class DeadlineExceededError(CommunicationError):
+    ...
+
+
+class Interned(type):
+    # Converters are immutable and their value depends only on the raw value,
+    # so identical raw values share one instance from a bounded LRU cache
+    maxsize = 128
+    classes = []
+
+    def __init__(cls, name, bases, namespace, **kwargs):
+        super().__init__(name, bases, namespace, **kwargs)
+        cls._instances = functools.lru_cache(maxsize=Interned.maxsize, typed=True)(
+            functools.partial(type.__call__, cls)
+        )
+        Interned.classes = [c for c in Interned.classes if c.__name__ != name]
+        Interned.classes.append(cls)
+
+    def __call__(cls, raw):
+        return cls._instances(raw)
+
+
+def converter_cache_info() -> dict:
+    return {cls.__name__: cls._instances.cache_info() for cls in Interned.classes}
+
+
+@dataclass(frozen=True, slots=True)
+class Date(metaclass=Interned):
     raw: int
     value: str = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_to_date(self.raw)
+        object.__setattr__(self, "value", self._convert_to_date(self.raw))
 
     def _convert_to_date(self, days: int) -> datetime:
         return (
@@ -21,13 +52,13 @@ class Date:
         ).isoformat()
 
 
-@dataclass
-class VoltageAcSetting:
+@dataclass(frozen=True, slots=True)
+class VoltageAcSetting(metaclass=Interned):
     raw: int
     value: str = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_voltage_ac_setting(self.raw)
+        object.__setattr__(self, "value", self._convert_voltage_ac_setting(self.raw))
 
     def _convert_voltage_ac_setting(self, value: int) -> str:
         # sourcery skip: assign-if-exp, move-assign, reintroduce-else,
@@ -58,8 +89,8 @@ class VoltageAcSetting:
             return "Unknown"
 
 
-@dataclass
-class SogRelayConfig:
+@dataclass(frozen=True, slots=True)
+class SogRelayConfig(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
     mog_presents: Optional[bool] = field(init=False)
@@ -75,12 +106,12 @@ class SogRelayConfig:
         SOG2_PRESENT = 1 << 3
         SOG3_PRESENT = 1 << 4
 
-        self.value = self._convert_sog_relay_config(self.raw)
-        self.mog_presents = self.raw & MOG_PRESENT > 0
-        self.sog0_presents = self.raw & SOG0_PRESENT > 0
-        self.sog1_presents = self.raw & SOG1_PRESENT > 0
-        self.sog2_presents = self.raw & SOG2_PRESENT > 0
-        self.sog3_presents = self.raw & SOG3_PRESENT > 0
+        object.__setattr__(self, "value", self._convert_sog_relay_config(self.raw))
+        object.__setattr__(self, "mog_presents", self.raw & MOG_PRESENT > 0)
+        object.__setattr__(self, "sog0_presents", self.raw & SOG0_PRESENT > 0)
+        object.__setattr__(self, "sog1_presents", self.raw & SOG1_PRESENT > 0)
+        object.__setattr__(self, "sog2_presents", self.raw & SOG2_PRESENT > 0)
+        object.__setattr__(self, "sog3_presents", self.raw & SOG3_PRESENT > 0)
 
     def _convert_sog_relay_config(self, value: int) -> dict:
         MOG_PRESENT = 1 << 0
@@ -103,13 +134,13 @@ class SogRelayConfig:
         return config
 
 
-@dataclass
-class UpsStatus:
+@dataclass(frozen=True, slots=True)
+class UpsStatus(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_ups_status(self.raw)
+        object.__setattr__(self, "value", self._convert_ups_status(self.raw))
 
     def _convert_ups_status(self, value: int) -> dict:
         ONLINE = 1 << 1
@@ -148,13 +179,15 @@ class UpsStatus:
         return status
 
 
-@dataclass
-class UpsStatusChangeCause:
+@dataclass(frozen=True, slots=True)
+class UpsStatusChangeCause(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_ups_status_change_cause(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_ups_status_change_cause(self.raw)
+        )
 
     def _convert_ups_status_change_cause(self, value: int) -> dict:
         # sourcery skip: assign-if-exp, low-code-quality, move-assign,
@@ -256,13 +289,13 @@ class UpsStatusChangeCause:
         return "Unknown"
 
 
-@dataclass
-class OutletStatus:
+@dataclass(frozen=True, slots=True)
+class OutletStatus(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_outlet_status(self.raw)
+        object.__setattr__(self, "value", self._convert_outlet_status(self.raw))
 
     def _convert_outlet_status(self, value: int) -> dict:
         STATE_ON = 1 << 0
@@ -303,13 +336,13 @@ class OutletStatus:
         return status
 
 
-@dataclass
-class SimpleSignalingStatus:
+@dataclass(frozen=True, slots=True)
+class SimpleSignalingStatus(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_simple_signal_status(self.raw)
+        object.__setattr__(self, "value", self._convert_simple_signal_status(self.raw))
 
     def _convert_simple_signal_status(self, value: int) -> dict:
         POWER_FAILURE = 1 << 0
@@ -323,13 +356,13 @@ class SimpleSignalingStatus:
         return status
 
 
-@dataclass
-class GeneralError:
+@dataclass(frozen=True, slots=True)
+class GeneralError(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_general_error(self.raw)
+        object.__setattr__(self, "value", self._convert_general_error(self.raw))
 
     def _convert_general_error(self, value: int) -> dict:
         SITE_WIRING = 1 << 0
@@ -358,13 +391,13 @@ class GeneralError:
         return status
 
 
-@dataclass
-class PowerSystemError:
+@dataclass(frozen=True, slots=True)
+class PowerSystemError(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_power_system_error(self.raw)
+        object.__setattr__(self, "value", self._convert_power_system_error(self.raw))
 
     def _convert_power_system_error(self, value: int) -> dict:
         OUTPUT_OVERLOAD = 1 << 0
@@ -408,13 +441,13 @@ class PowerSystemError:
         return status
 
 
-@dataclass
-class BatterySystemError:
+@dataclass(frozen=True, slots=True)
+class BatterySystemError(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_battery_system_error(self.raw)
+        object.__setattr__(self, "value", self._convert_battery_system_error(self.raw))
 
     def _convert_battery_system_error(self, value: int) -> dict:
         DISCONNECTED = 1 << 0
@@ -443,13 +476,15 @@ class BatterySystemError:
         return status
 
 
-@dataclass
-class ReplaceBatteryTestStatus:
+@dataclass(frozen=True, slots=True)
+class ReplaceBatteryTestStatus(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_replace_battery_test_status(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_replace_battery_test_status(self.raw)
+        )
 
     def _convert_replace_battery_test_status(self, value: int) -> dict:
         PENDING = 1 << 0
@@ -493,13 +528,15 @@ class ReplaceBatteryTestStatus:
         return status
 
 
-@dataclass
-class RuntimeCalibrationStatus:
+@dataclass(frozen=True, slots=True)
+class RuntimeCalibrationStatus(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_runtime_calibration_status(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_runtime_calibration_status(self.raw)
+        )
 
     def _convert_runtime_calibration_status(self, value: int) -> dict:
         PENDING = 1 << 0
@@ -555,13 +592,15 @@ class RuntimeCalibrationStatus:
         return status
 
 
-@dataclass
-class BatteryLifeTimeStatus:
+@dataclass(frozen=True, slots=True)
+class BatteryLifeTimeStatus(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_battery_life_time_status(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_battery_life_time_status(self.raw)
+        )
 
     def _convert_battery_life_time_status(self, value: int) -> dict:
         OK = 1 << 0
@@ -584,13 +623,13 @@ class BatteryLifeTimeStatus:
         return status
 
 
-@dataclass
-class UserInterfaceStatus:
+@dataclass(frozen=True, slots=True)
+class UserInterfaceStatus(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_user_interface_status(self.raw)
+        object.__setattr__(self, "value", self._convert_user_interface_status(self.raw))
 
     def _convert_user_interface_status(self, value: int) -> dict:
         TEST_IN_PROGRESS = 1 << 0
@@ -607,13 +646,13 @@ class UserInterfaceStatus:
         return status
 
 
-@dataclass
-class InputStatus:
+@dataclass(frozen=True, slots=True)
+class InputStatus(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_input_status(self.raw)
+        object.__setattr__(self, "value", self._convert_input_status(self.raw))
 
     def _convert_input_status(self, value: int) -> dict:
         ACCEPTABLE = 1 << 0
@@ -651,15 +690,15 @@ class InputStatus:
         return status
 
 
-@dataclass
-class InputEfficiency:
+@dataclass(frozen=True, slots=True)
+class InputEfficiency(metaclass=Interned):
     raw: int
     value: Optional[int | str] = field(init=False)
 
     def __post_init__(self):
         efficiency = self.raw / 128 if self.raw > 0 else self.raw
-        self.value = self._convert_input_efficiency(self.raw)
-        self.raw = efficiency
+        object.__setattr__(self, "value", self._convert_input_efficiency(self.raw))
+        object.__setattr__(self, "raw", efficiency)
 
     def _convert_input_efficiency(self, value: int) -> int | str:
         if value == -1:
@@ -682,13 +721,13 @@ class InputEfficiency:
             return round(value / 128, 1)
 
 
-@dataclass
-class CoutdownCounter:
+@dataclass(frozen=True, slots=True)
+class CoutdownCounter(metaclass=Interned):
     raw: int
     value: Optional[int | str] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_coutdown_counter(self.raw)
+        object.__setattr__(self, "value", self._convert_coutdown_counter(self.raw))
 
     def _convert_coutdown_counter(self, value) -> int | str:
         if value == -1:
@@ -699,13 +738,15 @@ class CoutdownCounter:
             return value
 
 
-@dataclass
-class BatteryTestIntervalSetting:
+@dataclass(frozen=True, slots=True)
+class BatteryTestIntervalSetting(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_battery_test_interval_setting(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_battery_test_interval_setting(self.raw)
+        )
 
     def _convert_battery_test_interval_setting(self, value: int) -> dict:
         NEVER = 1 << 0
@@ -731,13 +772,15 @@ class BatteryTestIntervalSetting:
         return command
 
 
-@dataclass
-class OutputSensitivitySetting:
+@dataclass(frozen=True, slots=True)
+class OutputSensitivitySetting(metaclass=Interned):
     raw: int
     value: Optional[int | str] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_output_sensitivity_setting(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_output_sensitivity_setting(self.raw)
+        )
 
     def _convert_output_sensitivity_setting(self, value: int) -> int | str:
         NORMAL = 1 << 0
@@ -754,13 +797,13 @@ class OutputSensitivitySetting:
         return command
 
 
-@dataclass
-class Upsdommand:
+@dataclass(frozen=True, slots=True)
+class Upsdommand(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_ups_command(self.raw)
+        object.__setattr__(self, "value", self._convert_ups_command(self.raw))
 
     def _convert_ups_command(self, value: int) -> dict:
         RESTORE_FACT_SETTINGS = 1 << 3
@@ -771,13 +814,13 @@ class Upsdommand:
         return command
 
 
-@dataclass
-class OutletCommand:
+@dataclass(frozen=True, slots=True)
+class OutletCommand(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_outlet_command(self.raw)
+        object.__setattr__(self, "value", self._convert_outlet_command(self.raw))
 
     def _convert_outlet_command(self, value: int) -> dict:
         CANCEL = 1 << 0
@@ -833,13 +876,15 @@ class OutletCommand:
         return status
 
 
-@dataclass
-class SimpleSignalingCommand:
+@dataclass(frozen=True, slots=True)
+class SimpleSignalingCommand(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_simple_signaling_command(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_simple_signaling_command(self.raw)
+        )
 
     def _convert_simple_signaling_command(self, value: int) -> dict:
         REQUEST_SHUTDOWN = 1 << 0
@@ -856,13 +901,15 @@ class SimpleSignalingCommand:
         return status
 
 
-@dataclass
-class ReplaceBatteryTestCommand:
+@dataclass(frozen=True, slots=True)
+class ReplaceBatteryTestCommand(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_replace_battery_test_command(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_replace_battery_test_command(self.raw)
+        )
 
     def _convert_replace_battery_test_command(self, value: int) -> dict:
         START = 1 << 0
@@ -876,13 +923,15 @@ class ReplaceBatteryTestCommand:
         return command
 
 
-@dataclass
-class RuntimeCalibrationCommand:
+@dataclass(frozen=True, slots=True)
+class RuntimeCalibrationCommand(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_runtime_calibration_command(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_runtime_calibration_command(self.raw)
+        )
 
     def _convert_runtime_calibration_command(self, value: int) -> dict:
         START_CALIBRATION = 0 << 0
@@ -896,13 +945,15 @@ class RuntimeCalibrationCommand:
         return command
 
 
-@dataclass
-class UserInterfaceCommand:
+@dataclass(frozen=True, slots=True)
+class UserInterfaceCommand(metaclass=Interned):
     raw: int
     value: Optional[dict[str]] = field(init=False)
 
     def __post_init__(self):
-        self.value = self._convert_user_interface_command(self.raw)
+        object.__setattr__(
+            self, "value", self._convert_user_interface_command(self.raw)
+        )
 
     def _convert_user_interface_command(self, value: int) -> dict:
         SHORT_TEST = 1 << 0
@@ -925,7 +976,7 @@ class UserInterfaceCommand:
         return command
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class InventoryData:
     fw_version: str
     model: str
@@ -946,7 +997,7 @@ class InventoryData:
     sog2_name: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StatusData:
     ups_status_change_cause: UpsStatusChangeCause
     ups_status: UpsStatus
@@ -965,7 +1016,7 @@ class StatusData:
     user_interface_status: UserInterfaceStatus
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DynamicData:
     runtime_remaining_s: int
     state_of_charge_pct: float
@@ -981,28 +1032,28 @@ class DynamicData:
     output_energy_kwh: float
     input0_voltage_ac: float
     input_efficiency: InputEfficiency
-    mog_turn_off_countdown: CoutdownCounter
-    mog_turn_on_countdown: CoutdownCounter
-    mog_stay_off_countdown: CoutdownCounter
-    sog0_turn_off_countdown: CoutdownCounter
-    sog0_turn_on_countdown: CoutdownCounter
-    sog0_stay_off_countdown: CoutdownCounter
-    sog1_turn_off_countdown: CoutdownCounter
-    sog1_turn_on_countdown: CoutdownCounter
-    sog1_stay_off_countdown: CoutdownCounter
-    sog2_turn_off_countdown: CoutdownCounter
-    sog2_turn_on_countdown: CoutdownCounter
-    sog2_stay_off_countdown: CoutdownCounter
-    sog3_turn_off_countdown: CoutdownCounter
-    sog3_turn_on_countdown: CoutdownCounter
-    sog3_stay_off_countdown: CoutdownCounter
+    mog_turn_off_countdown: int
+    mog_turn_on_countdown: int
+    mog_stay_off_countdown: int
+    sog0_turn_off_countdown: int
+    sog0_turn_on_countdown: int
+    sog0_stay_off_countdown: int
+    sog1_turn_off_countdown: int
+    sog1_turn_on_countdown: int
+    sog1_stay_off_countdown: int
+    sog2_turn_off_countdown: int
+    sog2_turn_on_countdown: int
+    sog2_stay_off_countdown: int
+    sog3_turn_off_countdown: int
+    sog3_turn_on_countdown: int
+    sog3_stay_off_countdown: int
     output0_apparent_power_va: float
     output0_real_power_w: float
     input_status: InputStatus
-    runtime_remaining_min: int
+    runtime_remaining_min: float
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Settings:
     output_upper_acceptable_voltage_setting: int
     output_lower_acceptable_voltage_setting: int
@@ -1030,7 +1081,7 @@ class Settings:
     output_sensitivity_setting: OutputSensitivitySetting
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CommandsData:
     ups_command: Upsdommand
     outlet_command: OutletCommand
@@ -1040,7 +1091,7 @@ class CommandsData:
     user_interface_command: UserInterfaceCommand
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class VerificationData:
     modbus_map_ID: str
     test_string: str
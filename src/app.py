@@ -1,18 +1,37 @@
-from dataclasses import asdict
-from random import randint
+from dataclasses import asdict, fields
+import json
 import time
 from mqtt_framework import Framework
 from mqtt_framework import Config
 from mqtt_framework.callbacks import Callbacks
 from mqtt_framework.app import TriggerSource
 
-from prometheus_client import Counter
+from flask import request
+from prometheus_client import Counter, Gauge
+from prometheus_client.core import CounterMetricFamily
 
 from datetime import datetime
 
 from cacheout import Cache
-from apcups import ApcUps
-from apcups_data import CommunicationError
+from delta import DeltaBuilder
+from adaptive_poll import AdaptivePollRate
+from aggregate import SiteAggregator
+from apcups_cache import InventoryCache
+from apcups_data import converter_cache_info
+from events import EventLog, TransitionDetector
+from field_filter import FieldFilter
+from fleet import FleetResult, FleetSupervisor
+from gateway import format_target, parse_targets
+from health import HealthMonitor
+from tracing import Tracer
+from poller import BLOCK_TYPES, FIELD_TYPES, PollResult, UpsPoller, format_values
+from publish_policy import HeartbeatScheduler, PublishPolicies, PublishPolicy
+from publish_queue import PublishQueue
+from scheduler import FixedRateScheduler
+from single_flight import SingleFlight
+from shared_state import SharedStateSink
+from sinks import parse_sinks
+from snapshot import SnapshotEncoder
 
 
 class MyConfig(Config):
@@ -25,7 +44,49 @@ class MyConfig(Config):
 
     APC_HOST = None
     APC_PORT = 502
+    APC_TARGETS = None
+    POLL_INTERVAL = 0
+    CYCLE_DEADLINE = 0
+    BATCH_DECODE = False
+    FLEET_PROCESSES = 0
     CACHE_TIME = 300
+    WARM_START_TIME = 0
+    INVENTORY_CACHE_FILE = None
+    INCLUDE_FIELDS = None
+    EXCLUDE_FIELDS = None
+    PUBLISH_POLICY = None
+    PUBLISH_MODE = "fields"
+    SNAPSHOT_ENCODING = "json"
+    DELTA_KEYFRAME_INTERVAL = 300
+    PUBLISH_QUEUE_SIZE = 1024
+    HEALTH_MAX_AGE = 300
+    HEALTH_MAX_LATENCY = 10
+    TRACE_BUFFER_SIZE = 20
+    SITE_AGGREGATES = None
+    SITE_TOPIC = "site"
+    SINKS = None
+    SINK_MEASUREMENT = "ups"
+    SINK_FLUSH_INTERVAL = 0
+    SHARED_STATE_FILE = None
+    SHARED_STATE_SLOT_SIZE = 8192
+    EVENT_LOG_SIZE = 100
+    EVENTS_TOPIC = "events"
+    ADAPTIVE_POLL_MAX_INTERVAL = 0
+    ADAPTIVE_POLL_STABLE_TIME = 300
+    ADAPTIVE_POLL_LOAD_CHANGE = 10
+
+
+class ConverterCacheCollector:
+    # Converter cache hits and misses are cumulative, they are read from the
+    # caches on scrape and exported as counters
+    def collect(self):
+        hits = CounterMetricFamily("converter_cache_hits", "", labels=["converter"])
+        misses = CounterMetricFamily("converter_cache_misses", "", labels=["converter"])
+        for converter, info in converter_cache_info().items():
+            hits.add_metric([converter], info.hits)
+            misses.add_metric([converter], info.misses)
+        yield hits
+        yield misses
 
 
 class MyApp:
@@ -42,88 +103,513 @@ class MyApp:
         self.fecth_errors_metric = Counter(
             "fecth_errors", "", registry=self.metrics_registry
         )
+        self.publish_queue_size_metric = Gauge(
+            "publish_queue_size", "", registry=self.metrics_registry
+        )
+        self.publish_queue_dropped_metric = Counter(
+            "publish_queue_dropped", "", registry=self.metrics_registry
+        )
+        self.publish_queue_collapsed_metric = Counter(
+            "publish_queue_collapsed", "", registry=self.metrics_registry
+        )
+        self.metrics_registry.register(ConverterCacheCollector())
+        self.poll_interval_metric = Gauge(
+            "poll_interval", "", registry=self.metrics_registry
+        )
+        self.missed_deadlines_metric = Counter(
+            "missed_deadlines", "", registry=self.metrics_registry
+        )
+        self.coalesced_updates_metric = Counter(
+            "coalesced_updates", "", registry=self.metrics_registry
+        )
 
-        self.valueCache = Cache(maxsize=256, ttl=self.config["CACHE_TIME"])
-        self.ups = ApcUps(
-            self.config["APC_HOST"], self.config["APC_PORT"], logger=self.logger
+        self.publish_queue = None
+        if self.config["PUBLISH_QUEUE_SIZE"] > 0:
+            self.publish_queue = PublishQueue(
+                self.publish_value_to_mqtt_topic,
+                maxsize=self.config["PUBLISH_QUEUE_SIZE"],
+                on_collapse=self.publish_queue_collapsed_metric.inc,
+                logger=self.logger,
+            )
+            self.publish_queue.start()
+
+        targets = self.get_targets()
+        self.health = HealthMonitor(
+            self.config["HEALTH_MAX_AGE"],
+            self.config["HEALTH_MAX_LATENCY"],
+            units=[format_target(*target) for target in targets],
+        )
+        self.add_url_rule("/health", "health", self.get_health)
+        self.valueCache = Cache(
+            maxsize=256 * len(targets), ttl=self.config["CACHE_TIME"]
         )
-        self.inventory_data = None
+        self.publishTimes = {}
+        self.heartbeat = HeartbeatScheduler()
+        self.publish_policies = PublishPolicies.parse(
+            self.config["PUBLISH_POLICY"],
+            PublishPolicy(max_interval=self.config["CACHE_TIME"]),
+        )
+        self.tracer = Tracer(self.config["TRACE_BUFFER_SIZE"])
+        self.add_url_rule("/traces", "traces", self.get_traces)
+        self.add_url_rule("/traces/chrome", "traces_chrome", self.get_chrome_traces)
+        self.sinks = []
+        if self.config["SINKS"]:
+            self.sinks = parse_sinks(
+                self.config["SINKS"],
+                self.config["SINK_MEASUREMENT"],
+                self.config["SINK_FLUSH_INTERVAL"],
+                FIELD_TYPES,
+                logger=self.logger,
+            )
+        if self.config["SHARED_STATE_FILE"]:
+            self.sinks.append(
+                SharedStateSink(
+                    self.config["SHARED_STATE_FILE"],
+                    len(targets),
+                    self.config["SHARED_STATE_SLOT_SIZE"],
+                    logger=self.logger,
+                )
+            )
+        self.event_log = None
+        self.transitions = None
+        if self.config["EVENT_LOG_SIZE"] > 0:
+            self.event_log = EventLog(self.config["EVENT_LOG_SIZE"])
+            self.transitions = TransitionDetector()
+            self.add_url_rule("/events", "events", self.get_events)
+        inventory_cache = None
+        if self.config["INVENTORY_CACHE_FILE"]:
+            inventory_cache = InventoryCache(
+                self.config["INVENTORY_CACHE_FILE"], logger=self.logger
+            )
+        self.snapshot = None
+        self.delta = None
+        if self.config["PUBLISH_MODE"] == "snapshot":
+            self.snapshot = SnapshotEncoder(self.config["SNAPSHOT_ENCODING"])
+        elif self.config["PUBLISH_MODE"] == "delta":
+            self.delta = DeltaBuilder(
+                self.config["DELTA_KEYFRAME_INTERVAL"], self.heartbeat
+            )
+        elif self.config["PUBLISH_MODE"] != "fields":
+            raise ValueError(f"Unknown publish mode '{self.config['PUBLISH_MODE']}'")
+        self.snapshotSchemas = set()
+        field_filter = None
+        if self.config["INCLUDE_FIELDS"] or self.config["EXCLUDE_FIELDS"]:
+            field_filter = FieldFilter.parse(
+                self.config["INCLUDE_FIELDS"], self.config["EXCLUDE_FIELDS"]
+            )
+        self.field_filter = field_filter
+        self.fleet = None
+        # Last known values of each UPS
+        self.unitValues = {}
+        self.fleetSnapshots = {}
+        if self.config["FLEET_PROCESSES"] > 0:
+            self.poller = self.fleet = FleetSupervisor(
+                targets,
+                self.config["FLEET_PROCESSES"],
+                inventory_cache_file=self.config["INVENTORY_CACHE_FILE"],
+                events=self.event_log is not None,
+                snapshot_encoding=self.snapshot and self.snapshot.encoding,
+                field_filter=field_filter,
+                cycle_deadline=self.config["CYCLE_DEADLINE"],
+                batch_decode=self.config["BATCH_DECODE"],
+                logger=self.logger,
+            )
+            self.fleet.start()
+        else:
+            self.poller = UpsPoller(
+                targets,
+                inventory_cache,
+                logger=self.logger,
+                tracer=self.tracer,
+                field_filter=field_filter,
+                cycle_deadline=self.config["CYCLE_DEADLINE"],
+                batch_decode=self.config["BATCH_DECODE"],
+            )
+        self.aggregator = None
+        if self.config["SITE_AGGREGATES"]:
+            self.aggregator = SiteAggregator.parse(self.config["SITE_AGGREGATES"])
+        self.poll_rate = None
+        if self.config["ADAPTIVE_POLL_MAX_INTERVAL"] > 0:
+            self.poll_rate = AdaptivePollRate(
+                self.config["ADAPTIVE_POLL_MAX_INTERVAL"],
+                self.config["ADAPTIVE_POLL_STABLE_TIME"],
+                self.config["ADAPTIVE_POLL_LOAD_CHANGE"],
+            )
+        self.single_flight = SingleFlight(
+            self.run_update_cycle, on_join=self.coalesced_updates_metric.inc
+        )
+        self.scheduler = None
+        if self.config["POLL_INTERVAL"] > 0:
+            self.scheduler = FixedRateScheduler(
+                self.config["POLL_INTERVAL"],
+                lambda: self.run_update(TriggerSource.INTERNAL),
+                on_missed=self.missed_deadlines_metric.inc,
+                logger=self.logger,
+            )
+        self.warm_start_done = self.config["WARM_START_TIME"] <= 0
+        self.warm_start_prefixes = None
+        if not self.warm_start_done and not self.get_warm_start_topics():
+            self.logger.warning(
+                "Warm start disabled, retained values can not seed the cache in "
+                f"{self.config['PUBLISH_MODE']} publish mode"
+            )
+            self.warm_start_done = True
+        self.retain_values = not self.warm_start_done
+
+    def get_targets(self) -> list[tuple[str, int, int]]:
+        if self.config["APC_TARGETS"]:
+            return parse_targets(self.config["APC_TARGETS"])
+        return [(self.config["APC_HOST"], self.config["APC_PORT"], 1)]
 
     def get_version(self) -> str:
         return "1.0.3"
 
     def stop(self) -> None:
         self.logger.debug("Exit")
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        if self.fleet is not None:
+            self.fleet.stop()
+        if self.publish_queue is not None:
+            self.publish_queue.stop()
+        for sink in self.sinks:
+            sink.close()
 
     def subscribe_to_mqtt_topics(self) -> None:
-        pass
+        # Internal scheduler starts polling once MQTT is connected
+        if self.scheduler is not None:
+            self.scheduler.start()
 
     def mqtt_message_received(self, topic: str, message: str) -> None:
-        pass
+        if self.warm_start_prefixes is None:
+            return
+        key = topic.removeprefix(self.config.get("MQTT_TOPIC_PREFIX", ""))
+        if key.startswith(self.warm_start_prefixes):
+            self.logger.debug(f"{key}: seed cache with retained value {message}")
+            self.valueCache.set(key, message, ttl=self.get_heartbeat_ttl(key))
 
     def do_healthy_check(self) -> bool:
-        return True
+        return self.health.is_healthy()
+
+    def get_health(self):
+        status = self.health.get_status()
+        return status, 200 if status["healthy"] else 503
+
+    def get_traces(self):
+        return self.tracer.get_traces(request.args.get("count", type=int))
+
+    def get_chrome_traces(self):
+        return self.tracer.to_chrome_trace(request.args.get("count", type=int))
+
+    def get_events(self):
+        return self.event_log.get_events(request.args.get("count", type=int))
 
     # Do work
     def do_update(self, trigger_source: TriggerSource) -> None:
+        if self.scheduler is not None and trigger_source != trigger_source.MANUAL:
+            # Polling is timed by the internal scheduler
+            return
+        self.run_update(trigger_source)
+
+    def run_update(self, trigger_source: TriggerSource) -> None:
+        # Trigger during an update joins it, manual trigger queues a follow-up
+        # update, as it must clear the cache after the update in flight
+        if not self.single_flight.run(
+            trigger_source, follow_up=trigger_source == trigger_source.MANUAL
+        ):
+            self.logger.debug(
+                f"Update in flight, coalesce trigger_source={trigger_source}"
+            )
+
+    def run_update_cycle(self, trigger_source: TriggerSource) -> None:
+        if self.poll_rate is not None:
+            if trigger_source == trigger_source.MANUAL:
+                self.poll_rate.reset()
+            elif not self.poll_rate.should_poll():
+                self.logger.debug("Skip update, UPS state is stable")
+                return
+            self.poll_rate.polled()
+
+        with self.tracer.cycle("update", trigger_source=str(trigger_source)):
+            self.update(trigger_source)
+
+        if self.poll_rate is not None:
+            self.poll_interval_metric.set(self.poll_rate.get_poll_interval())
+
+    def update(self, trigger_source: TriggerSource) -> None:
         self.logger.debug(f"Update called, trigger_source={trigger_source}")
         if trigger_source == trigger_source.MANUAL:
             self.valueCache.clear()
-            self.inventory_data = None
+            self.unitValues.clear()
+            self.fleetSnapshots.clear()
+            self.snapshotSchemas.clear()
+            if self.delta is not None:
+                self.delta.reset()
+            self.poller.reset()
 
+        if not self.warm_start_done:
+            # Warm start wait is not part of the cycle latency
+            self.warm_start_cache()
+
+        start = time.perf_counter()
+        timestamp = time.time()
+        succeeded = 0
         try:
-            self.fetch_data_with_retry(tries=3)
-        except Exception as e:
-            self.fecth_errors_metric.inc()
-            self.logger.error(f"Error occured: {e}")
+            for result in self.poller.poll():
+                if result.error is not None:
+                    self.fecth_errors_metric.inc()
+                    if self.aggregator is not None and result.serial_number:
+                        # UPS which is not read is not part of the site
+                        self.aggregator.remove(result.serial_number)
+                    self.logger.error(f"Error occured ({result.name}): {result.error}")
+                    continue
+                self.succesfull_fecth_metric.inc()
+                succeeded += 1
+                if self.fleet is None:
+                    values = self.publish_result(result)
+                    self.update_unit_values(result, values)
+                else:
+                    values = self.publish_fleet_result(result)
+                self.publish_stale(result)
+                if self.aggregator is not None:
+                    self.update_aggregates(
+                        result, self.unitValues[result.serial_number]
+                    )
+                if self.delta is not None:
+                    # Keyframe has the last known values of stale blocks too
+                    self.publish_delta(
+                        result.serial_number, self.unitValues[result.serial_number]
+                    )
+                self.write_to_sinks(
+                    result.serial_number, values, result.stale, timestamp
+                )
+        finally:
+            self.health.cycle_completed(time.perf_counter() - start)
+
+        if succeeded == 0:
             return
 
-        self.succesfull_fecth_metric.inc()
-        self.publish_value_to_mqtt_topic(
+        if self.aggregator is not None:
+            site = self.config["SITE_TOPIC"]
+            # Aggregate without any inputs is published empty, which also
+            # clears the retained value
+            values = {
+                name: "" if value is None else value
+                for name, value in self.aggregator.get_values().items()
+            }
+            self.publish_data(site, values)
+            if self.delta is not None:
+                self.publish_delta(site, format_values(site, values))
+        self.publish_to_mqtt(
             "lastUpdateTime",
             str(datetime.now().replace(microsecond=0).isoformat()),
             True,
         )
+        for sink in self.sinks:
+            sink.flush()
+        if self.publish_queue is not None:
+            self.publish_queue_size_metric.set(len(self.publish_queue))
 
-    def fetch_data_with_retry(self, tries: int = 1):
-        for i in range(tries):
-            try:
-                self.fetch_data()
-                break
-            except CommunicationError:
-                if i < tries - 1:
-                    rndtime = randint(100, 500) / 1000  # 0.1 - 0.5s #  nosec
-                    self.logger.debug(
-                        f"Communication error, retry {i+1} after {rndtime}s"
+    def publish_result(self, result: PollResult) -> dict[str, str]:
+        all_values = {}
+        for block, data in result.blocks:
+            self.health.block_succeeded(f"{result.name}/{block}")
+            with self.tracer.span(f"asdict {block}"):
+                values = format_values(result.serial_number, asdict(data))
+            with self.tracer.span(f"publish {block}"):
+                for key, value in values.items():
+                    self.observe_value(key, value)
+                    if self.snapshot is None:
+                        self.publish_value(key, value)
+                if self.snapshot is not None:
+                    self.publish_snapshot(
+                        result.serial_number, block, self.snapshot.encode(data)
                     )
-                    time.sleep(rndtime)
-                else:
-                    raise
-
-    def fetch_data(self):
-        if self.inventory_data is None:
-            self.inventory_data = self.ups.fetch_inventory_data()
-            self.inventory_data.serial_number
-
-        status_data = self.ups.fetch_status_data()
-        settings = self.ups.fetch_settings()
-        dynamic_data = self.ups.fetch_dynamic_data()
-        commands_data = self.ups.fetch_commands_data()
-        self.ups.close_connection()
-        self.publish_data(asdict(self.inventory_data))
-        self.publish_data(asdict(status_data))
-        self.publish_data(asdict(settings))
-        self.publish_data(asdict(dynamic_data))
-        self.publish_data(asdict(commands_data))
-
-    def publish_data(self, data: dict):
-        sn = self.inventory_data.serial_number
-        for key, value in data.items():
-            if value is not None:
-                val = f"{value:.1f}" if type(value) == float else str(value)
-                self.publish_value(f"{sn}/{key}", val)
-
-    def publish_value(self, key: str, value: str) -> None:
+            all_values.update(values)
+            if block == "status" and self.transitions is not None:
+                self.publish_events(
+                    result.serial_number,
+                    self.transitions.detect(result.serial_number, data),
+                )
+        return all_values
+
+    def publish_fleet_result(self, result: FleetResult) -> dict[str, str]:
+        for block in result.blocks:
+            self.health.block_succeeded(f"{result.name}/{block}")
+        if self.event_log is not None:
+            self.publish_events(result.serial_number, result.events)
+        values = self.unitValues.setdefault(result.serial_number, {})
+        for key, value in result.values:
+            if value is None:
+                self.remove_value(key)
+            else:
+                values[key] = value
+                self.observe_value(key, value)
+        # Workers send only changes, heartbeats are republished from the
+        # latest values
+        if self.snapshot is None:
+            for key, value in values.items():
+                if self.valueCache.get(key) != value:
+                    self.publish_value(key, value)
+        else:
+            snapshots = self.fleetSnapshots.setdefault(result.serial_number, {})
+            snapshots.update(result.snapshots)
+            for block, payload in snapshots.items():
+                if self.valueCache.get(f"{result.serial_number}/{block}") != payload:
+                    self.publish_snapshot(result.serial_number, block, payload)
+        return values
+
+    def update_unit_values(self, result: PollResult, values: dict[str, str]) -> None:
+        # Values of the blocks read, which are no longer available (e.g. value
+        # is None or outlet group is removed), are removed
+        unit_values = self.unitValues.setdefault(result.serial_number, {})
+        read = {
+            f.name for block, _ in result.blocks for f in fields(BLOCK_TYPES[block])
+        }
+        for key in [
+            key
+            for key in unit_values
+            if key not in values and key.partition("/")[2] in read
+        ]:
+            self.remove_value(key)
+        unit_values.update(values)
+
+    def remove_value(self, key: str) -> None:
+        self.unitValues[key.partition("/")[0]].pop(key, None)
+        if self.delta is not None:
+            self.delta.remove(key)
+
+    def update_aggregates(
+        self, result: PollResult | FleetResult, values: dict[str, str]
+    ) -> None:
+        # Fleet workers send only changed values, so aggregates are updated
+        # from the last known values. Values of stale blocks are left out.
+        stale = {f.name for block in result.stale for f in fields(BLOCK_TYPES[block])}
+        for field in self.aggregator.by_field:
+            key = f"{result.serial_number}/{field}"
+            if field in stale or key not in values:
+                self.aggregator.remove(result.serial_number, [field])
+            else:
+                self.aggregator.update(key, values[key])
+
+    def write_to_sinks(
+        self, sn: str, values: dict[str, str], stale: list[str], timestamp: float
+    ):
+        if not self.sinks:
+            return
+        prefix = f"{sn}/"
+        unit_values = {key.removeprefix(prefix): value for key, value in values.items()}
+        unit_values["stale"] = json.dumps(stale)
+        for sink in self.sinks:
+            sink.write(sn, unit_values, timestamp)
+
+    def warm_start_cache(self) -> None:
+        topics = self.get_warm_start_topics()
+        if not topics:
+            self.warm_start_done = True
+            return
+        serials = self.poller.load_inventories()
+        if not serials:
+            return
+
+        self.warm_start_done = True
+        self.logger.info(f"Seed cache from retained values of {', '.join(serials)}")
+        self.warm_start_prefixes = tuple(f"{sn}/" for sn in serials)
+        # Framework has no unsubscribe, so the subscriptions stay and the
+        # broker sends back every later publish to them. Dynamic data changes
+        # on every update and is not worth seeding, so only topics of the
+        # other blocks are subscribed.
+        for sn in serials:
+            for topic in topics:
+                self.subscribe_to_mqtt_topic(f"{sn}/{topic}")
+        time.sleep(self.config["WARM_START_TIME"])
+        self.warm_start_prefixes = None
+        self.logger.info(f"Cache warm start done, {len(self.valueCache)} values")
+
+    def get_warm_start_topics(self) -> list[str]:
+        # Nothing to seed, when the retained payloads are not comparable to
+        # the published values
+        blocks = [block for block in BLOCK_TYPES if block != "dynamic"]
+        if self.snapshot is not None:
+            # Binary payloads are received as str
+            return blocks if self.snapshot.encoding == "json" else []
+        if self.delta is not None:
+            # Values are published only in keyframes and deltas
+            return []
+        return [
+            f.name
+            for block in blocks
+            for f in fields(BLOCK_TYPES[block])
+            if self.field_filter is None or self.field_filter.matches(f.name)
+        ]
+
+    def publish_stale(self, result: PollResult | FleetResult) -> None:
+        if result.stale:
+            self.logger.warning(
+                f"Stale blocks ({result.name}): {', '.join(result.stale)}"
+            )
+        self.publish_value(f"{result.serial_number}/stale", json.dumps(result.stale))
+
+    def publish_events(self, sn: str, events: list[dict]) -> None:
+        if not events:
+            return
+        self.event_log.add(events)
+        for event in events:
+            self.logger.info(f"Event: {event}")
+            self.publish_to_mqtt(
+                f"{sn}/{self.config['EVENTS_TOPIC']}",
+                json.dumps(event),
+                False,
+                collapse=False,
+            )
+
+    def publish_data(self, sn: str, data: dict):
+        for key, value in format_values(sn, data).items():
+            self.observe_value(key, value)
+            self.publish_value(key, value)
+
+    def publish_delta(self, sn: str, values: dict[str, str]) -> None:
+        # Values changed since the previous cycle, or all values when
+        # keyframe is due. Cache is updated only when the message is queued,
+        # otherwise the values are published again on the next cycle.
+        patch = self.delta.publish(sn, values, self.publish_delta_message)
+        now = time.monotonic()
+        for field, value in patch.items():
+            key = f"{sn}/{field}"
+            if value is None:
+                self.valueCache.delete(key)
+                self.publishTimes.pop(key, None)
+            else:
+                self.valueCache.set(key, value, ttl=self.get_heartbeat_ttl(key))
+                self.publishTimes[key] = now
+
+    def publish_delta_message(
+        self, topic: str, patch: dict[str, str], keyframe: bool
+    ) -> bool:
+        self.logger.info(f"{topic} = {len(patch)} values")
+        # Deltas must not be collapsed in the publish queue
+        return self.publish_to_mqtt(topic, json.dumps(patch), keyframe, keyframe)
+
+    def publish_snapshot(self, sn: str, block: str, payload: str | bytes) -> None:
+        key = f"{sn}/{block}"
+        if key not in self.snapshotSchemas:
+            schema = self.snapshot.get_schema(BLOCK_TYPES[block])
+            if self.publish_to_mqtt(f"{key}/schema", schema, True):
+                self.snapshotSchemas.add(key)
+        self.publish_value(key, payload)
+
+    def get_policy(self, key: str) -> PublishPolicy:
+        return self.publish_policies.get(key.split("/", 1)[-1])
+
+    def get_heartbeat_ttl(self, key: str) -> float:
+        return self.heartbeat.ttl(key, self.get_policy(key).max_interval)
+
+    def observe_value(self, key: str, value: str) -> None:
+        if self.poll_rate is not None:
+            self.poll_rate.update(key, value)
+
+    def publish_value(self, key: str, value: str | bytes) -> None:
+        policy = self.get_policy(key)
         previousvalue = self.valueCache.get(key)
         publish = False
         if previousvalue is None:
@@ -131,13 +617,31 @@ class MyApp:
             publish = True
         elif value == previousvalue:
             self.logger.debug(f"{key} = {value} : skip update because of same value")
+        elif not policy.on_change:
+            self.logger.debug(f"{key} = {value} : skip update, wait max interval")
+        elif time.monotonic() - self.publishTimes.get(key, 0) < policy.min_interval:
+            self.logger.debug(f"{key} = {value} : skip update, min interval")
         else:
             publish = True
 
-        if publish:
+        if publish and self.delta is not None:
+            self.delta.add(key, value)
+        elif publish:
             self.logger.info("%s = %s", key, value)
-            self.publish_value_to_mqtt_topic(key, value, False)
-            self.valueCache.set(key, value)
+            if self.publish_to_mqtt(key, value, self.retain_values):
+                self.valueCache.set(key, value, ttl=self.get_heartbeat_ttl(key))
+                self.publishTimes[key] = time.monotonic()
+
+    def publish_to_mqtt(
+        self, key: str, value: str, retain: bool, collapse: bool = True
+    ) -> bool:
+        if self.publish_queue is None:
+            self.publish_value_to_mqtt_topic(key, value, retain)
+            return True
+        if not self.publish_queue.put(key, value, retain, collapse):
+            self.publish_queue_dropped_metric.inc()
+            return False
+        return True
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+import numpy as np
+
+from apcups import BLOCK_REGISTERS, ApcUps
+from apcups_data import DynamicData
+
+# Registers of the dynamic data block: name, address, big endian type and
+# scale. Values are divided by scale after decoding.
+DYNAMIC_LAYOUT = (
+    ("runtime_remaining_s", 128, ">u4", 1),
+    ("state_of_charge_pct", 130, ">u2", 512),
+    ("battery_positive_voltage_dc", 131, ">i2", 32),
+    ("battery_negative_voltage_dc", 132, ">i2", 32),
+    ("battery_replacement_date_int", 133, ">u2", 1),
+    ("battery_temperature", 135, ">i2", 128),
+    ("output0_real_power_pct", 136, ">u2", 256),
+    ("output0_apparent_power_pct", 138, ">u2", 256),
+    ("output0_current_ac", 140, ">u2", 32),
+    ("output0_voltage_ac", 142, ">u2", 64),
+    ("output_frequency", 144, ">u2", 128),
+    ("output_energy_kwh", 145, ">u4", 1000),
+    ("input_status_bf", 150, ">u2", 1),
+    ("input0_voltage_ac", 151, ">u2", 64),
+    ("input_efficiency_raw", 154, ">i2", 1),
+    *(
+        (f"{group}_{name}", 155 + 4 * i + offset, fmt, 1)
+        for i, group in enumerate(("mog", "sog0", "sog1", "sog2", "sog3"))
+        for name, offset, fmt in (
+            ("turn_off_countdown", 0, ">i2"),
+            ("turn_on_countdown", 1, ">i2"),
+            ("stay_off_countdown", 2, ">i4"),
+        )
+    ),
+)
+
+
+def get_block_dtype(block: str, layout) -> np.dtype:
+    # Structured type of one block of registers, skipped registers are
+    # padding
+    addr, reg_nb = BLOCK_REGISTERS[block]
+    return np.dtype(
+        {
+            "names": [name for name, _, _, _ in layout],
+            "formats": [fmt for _, _, fmt, _ in layout],
+            "offsets": [2 * (reg - addr) for _, reg, _, _ in layout],
+            "itemsize": 2 * reg_nb,
+        }
+    )
+
+
+DYNAMIC_DTYPE = get_block_dtype("dynamic", DYNAMIC_LAYOUT)
+
+
+def decode_block(registers: list[list[int]], dtype: np.dtype, layout) -> list[dict]:
+    # Decodes the same block of many UPS devices at once. Each row of
+    # registers is one block, result is a dict of values per row.
+    records = np.array(registers, dtype=">u2").view(dtype).ravel()
+    columns = []
+    for name, _, _, scale in layout:
+        column = records[name]
+        columns.append((column if scale == 1 else column / scale).tolist())
+    names = [name for name, _, _, _ in layout]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def decode_dynamic_data(
+    upses: list[ApcUps], registers: list[list[int]]
+) -> list[DynamicData]:
+    if not upses:
+        return []
+    return [
+        ups.create_dynamic_data(**values)
+        for ups, values in zip(
+            upses, decode_block(registers, DYNAMIC_DTYPE, DYNAMIC_LAYOUT)
+        )
+    ]
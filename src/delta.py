@@ -0,0 +1,77 @@
+import math
+import time
+from typing import Callable
+
+from publish_policy import HeartbeatScheduler
+
+
+class DeltaBuilder:
+    # Collects the values of each UPS which would be published in field
+    # mode, to publish them as one JSON merge patch per update cycle. A full
+    # keyframe is due once per keyframe_interval, spread evenly per UPS.
+    def __init__(self, keyframe_interval: float, heartbeat: HeartbeatScheduler = None):
+        self.keyframe_interval = keyframe_interval
+        self.heartbeat = heartbeat or HeartbeatScheduler()
+        self.pending = {}
+        self.next_keyframe = {}
+
+    def add(self, key: str, value: str | None) -> None:
+        sn, _, field = key.partition("/")
+        self.pending.setdefault(sn, {})[field] = value
+
+    def remove(self, key: str) -> None:
+        # Removed value is published as null
+        self.add(key, None)
+
+    def take(self, sn: str) -> dict[str, str]:
+        return self.pending.pop(sn, {})
+
+    def publish(
+        self,
+        sn: str,
+        values: dict[str, str],
+        publish: Callable[[str, dict[str, str], bool], bool],
+    ) -> dict[str, str]:
+        # Publishes the pending values as JSON merge patch to <sn>/delta, or
+        # all values to <sn>/keyframe when keyframe is due. Returns the
+        # published values by field, nothing if the publish was dropped.
+        # Removed values are None, and left out of the keyframe.
+        patch = self.take(sn)
+        keyframe = self.is_keyframe_due(sn)
+        if keyframe:
+            # Pending values not in the UPS values (e.g. list of stale blocks)
+            # are part of the state too
+            prefix = f"{sn}/"
+            patch = {
+                field: value
+                for field, value in {
+                    **{key.removeprefix(prefix): v for key, v in values.items()},
+                    **patch,
+                }.items()
+                if value is not None
+            }
+            topic = f"{sn}/keyframe"
+        elif patch:
+            topic = f"{sn}/delta"
+        else:
+            return {}
+
+        if not publish(topic, patch, keyframe):
+            return {}
+        if keyframe:
+            self.keyframe_published(sn)
+        return patch
+
+    def is_keyframe_due(self, sn: str, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return now >= self.next_keyframe.get(sn, 0)
+
+    def keyframe_published(self, sn: str, now: float = None) -> None:
+        now = time.monotonic() if now is None else now
+        # Interval 0 publishes keyframe only after start and reset
+        ttl = self.heartbeat.ttl(f"{sn}/keyframe", self.keyframe_interval)
+        self.next_keyframe[sn] = now + ttl if ttl else math.inf
+
+    def reset(self) -> None:
+        self.pending.clear()
+        self.next_keyframe.clear()
@@ -0,0 +1,64 @@
+from collections import deque
+from dataclasses import fields
+from datetime import datetime
+import threading
+import time
+
+from apcups_data import StatusData
+
+
+class TransitionDetector:
+    # Compares consecutive status data of each UPS and creates one event per
+    # flag that was set or cleared
+    def __init__(self):
+        self.previous = {}
+
+    def detect(self, unit: str, status_data: StatusData) -> list[dict]:
+        monotonic = time.monotonic()
+        timestamp = None
+        cause = None
+        if status_data.ups_status_change_cause is not None:
+            cause = status_data.ups_status_change_cause.value
+        events = []
+        for f in fields(status_data):
+            current = getattr(status_data, f.name)
+            if current is None or not isinstance(current.value, list):
+                continue
+            previous = self.previous.get((unit, f.name))
+            self.previous[(unit, f.name)] = current
+            if previous is None or previous.raw == current.raw:
+                continue
+
+            timestamp = timestamp or datetime.now().isoformat(timespec="milliseconds")
+            cleared = [x for x in previous.value if x not in current.value]
+            raised = [x for x in current.value if x not in previous.value]
+            for flags, old, new in ((cleared, True, False), (raised, False, True)):
+                for flag in flags:
+                    events.append(
+                        {
+                            "unit": unit,
+                            "field": f.name,
+                            "flag": flag,
+                            "from": old,
+                            "to": new,
+                            "monotonic": round(monotonic, 3),
+                            "time": timestamp,
+                            "cause": cause,
+                        }
+                    )
+        return events
+
+
+class EventLog:
+    def __init__(self, max_events: int = 100):
+        self.events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def add(self, events: list[dict]) -> None:
+        with self._lock:
+            self.events.extend(events)
+
+    def get_events(self, count: int = None) -> list[dict]:
+        with self._lock:
+            events = list(self.events)
+        return events[-count:] if count else events
@@ -0,0 +1,26 @@
+from fnmatch import fnmatchcase
+
+
+class FieldFilter:
+    # Selects fields by comma separated glob patterns. Field is selected when
+    # it matches an include pattern (or no include patterns are given) and
+    # does not match any exclude pattern.
+    def __init__(self, include: list[str] = None, exclude: list[str] = None):
+        self.include = include or []
+        self.exclude = exclude or []
+        self._matches = {}
+
+    @classmethod
+    def parse(cls, include: str | None, exclude: str | None) -> "FieldFilter":
+        def split(spec):
+            return [p.strip() for p in (spec or "").split(",") if p.strip()]
+
+        return cls(split(include), split(exclude))
+
+    def matches(self, field: str) -> bool:
+        if (result := self._matches.get(field)) is None:
+            result = (
+                not self.include or any(fnmatchcase(field, p) for p in self.include)
+            ) and not any(fnmatchcase(field, p) for p in self.exclude)
+            self._matches[field] = result
+        return result
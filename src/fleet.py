@@ -0,0 +1,261 @@
+from dataclasses import asdict, dataclass, field, fields
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import multiprocessing
+from multiprocessing.connection import wait
+from typing import Iterator
+
+from apcups_cache import InventoryCache
+from events import TransitionDetector
+from field_filter import FieldFilter
+from poller import BLOCK_TYPES, UpsPoller, format_values
+from snapshot import SnapshotEncoder
+
+
+@dataclass
+class FleetResult:
+    name: str
+    serial_number: str | None
+    blocks: list[str] = field(default_factory=list)
+    # Changed values, None when the value was removed
+    values: list[tuple[str, str | None]] = field(default_factory=list)
+    events: list[dict] = field(default_factory=list)
+    snapshots: list[tuple[str, str | bytes]] = field(default_factory=list)
+    stale: list[str] = field(default_factory=list)
+    error: str | None = None
+
+
+def _worker_main(
+    targets,
+    conn,
+    inventory_cache_file,
+    tries,
+    events,
+    snapshot_encoding,
+    field_filter,
+    cycle_deadline,
+    batch_decode,
+    log_queue,
+    log_level,
+) -> None:
+    # Spawned process has no logging configuration, records are sent to the
+    # supervisor and handled by its logger
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(log_level)
+    logger = logging.getLogger(f"{__name__}.worker")
+    inventory_cache = None
+    if inventory_cache_file:
+        inventory_cache = InventoryCache(inventory_cache_file, logger=logger)
+    poller = UpsPoller(
+        targets,
+        inventory_cache,
+        tries,
+        logger=logger,
+        field_filter=field_filter,
+        cycle_deadline=cycle_deadline,
+        batch_decode=batch_decode,
+    )
+    # Last values sent to the supervisor, only changes are sent
+    sent = {}
+    detector = TransitionDetector() if events else None
+    encoder = SnapshotEncoder(snapshot_encoding) if snapshot_encoding else None
+
+    while True:
+        try:
+            command = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if command == "stop":
+            break
+        if command == "reset":
+            poller.reset()
+            sent.clear()
+            conn.send(None)
+        elif command == "inventory":
+            conn.send(poller.load_inventories())
+        elif command == "poll":
+            conn.send(
+                [_to_fleet_result(r, sent, detector, encoder) for r in poller.poll()]
+            )
+
+
+def _to_fleet_result(
+    result, sent: dict, detector: TransitionDetector, encoder: SnapshotEncoder
+) -> FleetResult:
+    if result.error is not None:
+        return FleetResult(result.name, result.serial_number, error=str(result.error))
+
+    values = {}
+    events = []
+    snapshots = []
+    for block, data in result.blocks:
+        values.update(format_values(result.serial_number, asdict(data)))
+        if block == "status" and detector is not None:
+            events = detector.detect(result.serial_number, data)
+        if encoder is not None:
+            key = f"{result.serial_number}/{block}"
+            payload = encoder.encode(data)
+            if sent.get(key) != payload:
+                sent[key] = payload
+                snapshots.append((block, payload))
+    delta = [(key, value) for key, value in values.items() if sent.get(key) != value]
+    sent.update(delta)
+    prefix = f"{result.serial_number}/"
+    read = {f.name for block, _ in result.blocks for f in fields(BLOCK_TYPES[block])}
+    for key in [
+        key
+        for key in sent
+        if key.startswith(prefix) and key not in values and key[len(prefix) :] in read
+    ]:
+        del sent[key]
+        delta.append((key, None))
+    return FleetResult(
+        result.name,
+        result.serial_number,
+        blocks=[block for block, _ in result.blocks],
+        values=delta,
+        events=events,
+        snapshots=snapshots,
+        stale=result.stale,
+    )
+
+
+def shard_targets(
+    targets: list[tuple[str, int, int]], processes: int
+) -> list[list[tuple[str, int, int]]]:
+    # Units behind the same gateway share one connection, so they are kept
+    # in the same shard. Largest gateways are placed first, each on the
+    # shard with the fewest units.
+    gateways = {}
+    for target in targets:
+        gateways.setdefault(target[:2], []).append(target)
+    shards = [[] for _ in range(processes)]
+    for units in sorted(gateways.values(), key=len, reverse=True):
+        min(shards, key=len).extend(units)
+    return [shard for shard in shards if shard]
+
+
+class FleetSupervisor:
+    # Shards UPS devices across worker processes. Each worker polls and
+    # decodes its devices and sends back only the changed values, so decoding
+    # scales with cores while publishing stays in the supervisor process.
+    def __init__(
+        self,
+        targets: list[tuple[str, int, int]],
+        processes: int,
+        inventory_cache_file: str = None,
+        tries: int = 3,
+        events: bool = False,
+        snapshot_encoding: str = None,
+        field_filter: FieldFilter = None,
+        cycle_deadline: float = 0,
+        batch_decode: bool = False,
+        logger=None,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.inventory_cache_file = inventory_cache_file
+        self.tries = tries
+        self.events = events
+        self.snapshot_encoding = snapshot_encoding
+        self.field_filter = field_filter
+        self.cycle_deadline = cycle_deadline
+        self.batch_decode = batch_decode
+        self.shards = shard_targets(targets, processes)
+        self.workers = [None] * len(self.shards)
+        self.context = multiprocessing.get_context("spawn")
+        self.log_queue = None
+        self.log_listener = None
+
+    def start(self) -> None:
+        if self.log_listener is None:
+            self.log_queue = self.context.Queue()
+            # Logger handles the records like a handler
+            self.log_listener = QueueListener(self.log_queue, self.logger)
+            self.log_listener.start()
+        for i in range(len(self.shards)):
+            if self.workers[i] is None or not self.workers[i][0].is_alive():
+                self._start_worker(i)
+
+    def _start_worker(self, index: int) -> None:
+        # Workers are spawned, forking the threaded main process could
+        # deadlock the worker on a lock held by another thread
+        conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(
+                self.shards[index],
+                child_conn,
+                self.inventory_cache_file,
+                self.tries,
+                self.events,
+                self.snapshot_encoding,
+                self.field_filter,
+                self.cycle_deadline,
+                self.batch_decode,
+                self.log_queue,
+                self.logger.getEffectiveLevel(),
+            ),
+            name=f"fleet-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self.workers[index] = (process, conn)
+        self.logger.debug(f"Started fleet worker {index} for {self.shards[index]}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        for worker in self.workers:
+            if worker is None:
+                continue
+            process, conn = worker
+            try:
+                conn.send("stop")
+            except OSError:
+                pass
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.workers = [None] * len(self.shards)
+        if self.log_listener is not None:
+            self.log_listener.stop()
+            self.log_listener = None
+
+    def _request(self, command: str) -> Iterator[tuple[int, object]]:
+        self.start()
+        pending = {}
+        for i, (_, conn) in enumerate(self.workers):
+            try:
+                conn.send(command)
+                pending[conn] = i
+            except OSError as e:
+                yield i, e
+        while pending:
+            for conn in wait(list(pending)):
+                i = pending.pop(conn)
+                try:
+                    yield i, conn.recv()
+                except (EOFError, OSError) as e:
+                    yield i, e
+
+    def reset(self) -> None:
+        for i, reply in self._request("reset"):
+            if isinstance(reply, Exception):
+                self.logger.error(f"Fleet worker {i} failed: {reply}")
+
+    def load_inventories(self) -> list[str]:
+        serials = []
+        for i, reply in self._request("inventory"):
+            if isinstance(reply, Exception):
+                self.logger.error(f"Fleet worker {i} failed: {reply}")
+            else:
+                serials.extend(reply)
+        return serials
+
+    def poll(self) -> Iterator[FleetResult]:
+        for i, reply in self._request("poll"):
+            if isinstance(reply, Exception):
+                self.logger.error(f"Fleet worker {i} failed: {reply}")
+                yield FleetResult(f"fleet-worker-{i}", None, error=str(reply))
+            else:
+                yield from reply
@@ -0,0 +1,94 @@
+import threading
+from pyModbusTCP.client import ModbusClient
+
+
+def parse_targets(targets: str) -> list[tuple[str, int, int]]:
+    # Format: host[:port[:unit_id]],host[:port[:unit_id]],...
+    result = []
+    for target in targets.split(","):
+        if not target.strip():
+            continue
+        parts = target.strip().split(":")
+        if len(parts) > 3:
+            raise ValueError(f"Invalid target '{target}'")
+        port = parts[1] if len(parts) > 1 and parts[1] else 502
+        unit_id = parts[2] if len(parts) > 2 and parts[2] else 1
+        result.append((parts[0], int(port), int(unit_id)))
+    return result
+
+
+def format_target(host: str, port: int, unit_id: int) -> str:
+    # Name of the UPS in logs and health status
+    return f"{host}:{port}" if unit_id == 1 else f"{host}:{port}:{unit_id}"
+
+
+class ModbusGateway:
+    # One TCP connection to a Modbus TCP gateway, shared by all units behind
+    # it. Requests of different units are serialized over the connection.
+    def __init__(self, host: str, port: int = 502, debug: bool = False):
+        self.client = ModbusClient(
+            host=host,
+            port=port,
+            auto_open=True,
+            auto_close=False,
+            debug=debug,
+        )
+        self.timeout = self.client.timeout
+        self.lock = threading.RLock()
+
+    def unit(self, unit_id: int) -> "GatewayUnitClient":
+        return GatewayUnitClient(self, unit_id)
+
+    def set_timeout(self, timeout: float | None) -> None:
+        # Timeout of an open socket is changed directly, because setting
+        # ModbusClient.timeout to a new value closes the connection
+        timeout = min(timeout, self.timeout) if timeout else self.timeout
+        with self.lock:
+            if self.client.is_open:
+                self.client._sock.settimeout(timeout)
+            elif self.client.timeout != timeout:
+                self.client.timeout = timeout
+
+    def open(self, timeout: float = None) -> bool:
+        with self.lock:
+            if self.client.is_open:
+                return True
+            self.set_timeout(timeout)
+            return self.client.open()
+
+    def close(self) -> None:
+        with self.lock:
+            self.client.close()
+
+
+class GatewayUnitClient:
+    # ModbusClient like view of a single unit behind a ModbusGateway
+    def __init__(self, gateway: ModbusGateway, unit_id: int):
+        self.gateway = gateway
+        self.unit_id = unit_id
+        self.last_except = 0
+
+    @property
+    def host(self) -> str:
+        return self.gateway.client.host
+
+    @property
+    def port(self) -> int:
+        return self.gateway.client.port
+
+    def open(self, timeout: float = None) -> bool:
+        return self.gateway.open(timeout)
+
+    def close(self) -> None:
+        # Shared connection is closed by the gateway owner
+        pass
+
+    def read_holding_registers(
+        self, reg_addr: int, reg_nb: int, timeout: float = None
+    ) -> list[int] | None:
+        with self.gateway.lock:
+            self.gateway.set_timeout(timeout)
+            self.gateway.client.unit_id = self.unit_id
+            result = self.gateway.client.read_holding_registers(reg_addr, reg_nb)
+            self.last_except = self.gateway.client.last_except
+            return result
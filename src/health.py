@@ -0,0 +1,87 @@
+from collections import deque
+from datetime import datetime
+import math
+import threading
+import time
+
+
+class HealthMonitor:
+    def __init__(
+        self,
+        max_age: float,
+        max_latency: float,
+        window: int = 100,
+        units: list[str] = (),
+    ):
+        self.max_age = max_age
+        self.max_latency = max_latency
+        self.started = time.monotonic()
+        # Units expected to be read, block keys are "<unit>/<block>"
+        self.units = list(units)
+        self.last_success = {}
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def block_succeeded(self, block: str) -> None:
+        with self._lock:
+            self.last_success[block] = (time.monotonic(), datetime.now())
+
+    def cycle_completed(self, duration: float) -> None:
+        with self._lock:
+            self.latencies.append(duration)
+
+    def _percentile(self, values: list[float], pct: float) -> float | None:
+        if not values:
+            return None
+        return values[max(math.ceil(pct / 100 * len(values)) - 1, 0)]
+
+    def get_status(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            latencies = sorted(self.latencies)
+            last_success = dict(self.last_success)
+
+        blocks = {}
+        for block, (success, timestamp) in last_success.items():
+            age = now - success
+            blocks[block] = {
+                "last_success": timestamp.replace(microsecond=0).isoformat(),
+                "age_s": round(age, 3),
+                "fresh": self.max_age <= 0 or age <= self.max_age,
+            }
+
+        # Freshness of units not read successfully yet is measured from start
+        started_fresh = self.max_age <= 0 or now - self.started <= self.max_age
+        waiting = [
+            unit
+            for unit in self.units
+            if not any(block.startswith(f"{unit}/") for block in blocks)
+        ]
+        fresh = all(b["fresh"] for b in blocks.values())
+        if waiting or not blocks:
+            fresh = fresh and started_fresh
+
+        p95 = self._percentile(latencies, 95)
+        latency_ok = self.max_latency <= 0 or p95 is None or p95 <= self.max_latency
+
+        return {
+            "healthy": fresh and latency_ok,
+            "fresh": fresh,
+            "latency_ok": latency_ok,
+            "blocks": blocks,
+            "waiting": waiting,
+            "latency_s": {
+                "samples": len(latencies),
+                "p50": self._percentile(latencies, 50),
+                "p95": p95,
+                "p99": self._percentile(latencies, 99),
+                "max": latencies[-1] if latencies else None,
+            },
+            "thresholds": {
+                "max_age_s": self.max_age,
+                "max_p95_latency_s": self.max_latency,
+            },
+        }
+
+    def is_healthy(self) -> bool:
+        return self.get_status()["healthy"]
@@ -0,0 +1,329 @@
+from dataclasses import asdict, dataclass, field, fields
+import logging
+from random import randint
+import time
+from typing import Callable, Iterator
+
+from apcups import ApcUps
+from apcups_cache import InventoryCache
+from apcups_data import (
+    CommandsData,
+    CommunicationError,
+    DeadlineExceededError,
+    DynamicData,
+    InventoryData,
+    Settings,
+    StatusData,
+)
+from field_filter import FieldFilter
+from gateway import ModbusGateway
+from tracing import Tracer
+
+BLOCK_TYPES = {
+    "inventory": InventoryData,
+    "status": StatusData,
+    "settings": Settings,
+    "dynamic": DynamicData,
+    "commands": CommandsData,
+}
+
+# Types of the fields of all data blocks
+FIELD_TYPES = {f.name: f.type for t in BLOCK_TYPES.values() for f in fields(t)}
+
+
+def format_values(sn: str, data: dict) -> dict[str, str]:
+    return {
+        f"{sn}/{key}": f"{value:.1f}" if isinstance(value, float) else str(value)
+        for key, value in data.items()
+        if value is not None
+    }
+
+
+@dataclass
+class PollResult:
+    name: str
+    serial_number: str | None
+    blocks: list[tuple[str, object]] = field(default_factory=list)
+    stale: list[str] = field(default_factory=list)
+    error: Exception | None = None
+
+
+class UpsPoller:
+    # Reads all data blocks of a set of UPS devices. Devices behind the same
+    # Modbus TCP gateway share one connection.
+    def __init__(
+        self,
+        targets: list[tuple[str, int, int]],
+        inventory_cache: InventoryCache = None,
+        tries: int = 3,
+        logger=None,
+        tracer: Tracer = None,
+        field_filter: FieldFilter = None,
+        cycle_deadline: float = 0,
+        batch_decode: bool = False,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.tracer = tracer or Tracer()
+        self.inventory_cache = inventory_cache
+        self.tries = tries
+        self.cycle_deadline = cycle_deadline
+        self.batch_decode = batch_decode
+        if batch_decode:
+            # NumPy is an optional dependency, only needed for batch decoding
+            from batch_decode import decode_dynamic_data
+
+            self.decode_dynamic_data = decode_dynamic_data
+        # Register support maps by model and firmware version
+        self.register_support = {}
+        # Consecutive failed updates by UPS and block
+        self.block_failures = {}
+        self.gateways = {}
+        self.upses = []
+        for host, port, unit_id in targets:
+            if (host, port) not in self.gateways:
+                self.gateways[(host, port)] = ModbusGateway(host, port)
+            self.upses.append(
+                ApcUps(
+                    host,
+                    port,
+                    unit_id,
+                    logger=self.logger,
+                    tracer=self.tracer,
+                    client=self.gateways[(host, port)].unit(unit_id),
+                    field_filter=field_filter,
+                )
+            )
+
+    def reset(self) -> None:
+        for ups in self.upses:
+            ups.inventory_data = None
+            ups.set_register_support(None)
+            if self.inventory_cache is not None:
+                self.inventory_cache.remove(ups.name)
+        if self.inventory_cache is not None:
+            for key in self.register_support:
+                self.inventory_cache.remove(f"register_support/{key}")
+        self.register_support.clear()
+        self.block_failures.clear()
+
+    def close_connections(self) -> None:
+        for gateway in self.gateways.values():
+            gateway.close()
+
+    def load_inventories(self) -> list[str]:
+        for ups in self.upses:
+            try:
+                if ups.inventory_data is None:
+                    ups.open_connection()
+                    self.fetch_inventory_data(ups)
+            except CommunicationError as e:
+                self.logger.warning(f"Inventory read failed ({ups.name}): {e}")
+        return [u.inventory_data.serial_number for u in self.upses if u.inventory_data]
+
+    def poll(self) -> Iterator[PollResult]:
+        deadline = None
+        if self.cycle_deadline > 0:
+            deadline = time.monotonic() + self.cycle_deadline
+        try:
+            results = self.poll_upses(deadline)
+            if self.batch_decode:
+                results = self.decode_batch(list(results))
+            yield from results
+        finally:
+            for ups in self.upses:
+                ups.deadline = None
+            self.close_connections()
+
+    def poll_upses(self, deadline: float | None) -> Iterator[PollResult]:
+        for i, ups in enumerate(self.upses):
+            unit_deadline = None
+            if deadline is not None:
+                # Each unit gets an equal share of the time left, so a device
+                # which does not respond does not use the time of the others
+                now = time.monotonic()
+                unit_deadline = now + (deadline - now) / (len(self.upses) - i)
+            yield self.poll_ups(ups, unit_deadline)
+
+    def poll_ups(self, ups: ApcUps, deadline: float | None) -> PollResult:
+        ups.deadline = deadline
+        try:
+            blocks = self.fetch_data_with_retry(ups)
+            read = [block for block, _ in blocks]
+            return PollResult(
+                ups.name,
+                ups.inventory_data.serial_number,
+                blocks,
+                stale=[b for b in self.get_blocks(ups) if b not in read],
+            )
+        except Exception as e:
+            sn = ups.inventory_data.serial_number if ups.inventory_data else None
+            return PollResult(ups.name, sn, error=e)
+
+    def decode_batch(self, results: list[PollResult]) -> list[PollResult]:
+        # Dynamic data blocks were read as registers, decode the blocks of
+        # all UPS devices at once
+        batch = [
+            (ups, result.blocks, i)
+            for ups, result in zip(self.upses, results)
+            for i, (block, _) in enumerate(result.blocks)
+            if block == "dynamic"
+        ]
+        with self.tracer.span(f"decode {len(batch)} dynamic"):
+            decoded = self.decode_dynamic_data(
+                [ups for ups, _, _ in batch],
+                [blocks[i][1] for _, blocks, i in batch],
+            )
+        for (_, blocks, i), data in zip(batch, decoded):
+            blocks[i] = ("dynamic", data)
+        return results
+
+    def fetch_data_with_retry(self, ups: ApcUps) -> list[tuple[str, object]]:
+        self.retry(ups, lambda: self.connect(ups), self.tries)
+
+        blocks = [("inventory", ups.select_fields(ups.inventory_data))]
+        fetchers = {
+            "status": ups.fetch_status_data,
+            "settings": ups.fetch_settings,
+            "dynamic": (
+                (lambda: ups.read_block("dynamic"))
+                if self.batch_decode
+                else ups.fetch_dynamic_data
+            ),
+            "commands": ups.fetch_commands_data,
+        }
+        error = None
+        for block in self.get_blocks(ups):
+            key = (ups.name, block)
+            # Block which failed on the previous update is tried only once, so
+            # a failing block does not delay the other blocks on every update
+            tries = 1 if key in self.block_failures else self.tries
+            try:
+                with self.tracer.span(f"fetch {ups.name} {block}"):
+                    blocks.append((block, self.retry(ups, fetchers[block], tries)))
+                self.block_failures.pop(key, None)
+            except DeadlineExceededError as e:
+                # Completed blocks are published, the rest are stale
+                self.logger.warning(f"{ups.name}: {e}")
+                break
+            except CommunicationError as e:
+                # Other blocks are published, the failed block is stale
+                self.block_failures[key] = self.block_failures.get(key, 0) + 1
+                self.logger.warning(
+                    f"{ups.name}: {block} read failed "
+                    f"({self.block_failures[key]} updates in a row): {e}"
+                )
+                error = e
+        if error is not None and len(blocks) == 1:
+            raise error
+        return blocks
+
+    def retry(self, ups: ApcUps, fn: Callable[[], object], tries: int):
+        for i in range(tries):
+            try:
+                if i > 0:
+                    # Reopen the connection, if the failed request closed
+                    # it. ModbusClient closes the socket on timeout and on a
+                    # response with wrong transaction ID, so a late response
+                    # of the failed request is not taken as the response of
+                    # the retry. An open shared connection is kept.
+                    ups.open_connection()
+                return fn()
+            except DeadlineExceededError:
+                raise
+            except CommunicationError:
+                rndtime = randint(100, 500) / 1000  # 0.1 - 0.5s #  nosec
+                if ups.deadline is not None and (
+                    time.monotonic() + rndtime >= ups.deadline
+                ):
+                    raise
+                if i < tries - 1:
+                    self.logger.debug(
+                        f"Communication error, retry {i+1} after {rndtime}s"
+                    )
+                    time.sleep(rndtime)
+                else:
+                    raise
+
+    def connect(self, ups: ApcUps) -> None:
+        with self.tracer.span(f"connect {ups.name}"):
+            ups.open_connection()
+
+        if ups.inventory_data is None:
+            with self.tracer.span(f"fetch {ups.name} inventory"):
+                self.fetch_inventory_data(ups)
+
+        if ups.register_support is None or ups.register_support.get("unknown"):
+            self.fetch_register_support(ups)
+
+    def get_blocks(self, ups: ApcUps) -> list[str]:
+        # Data blocks read on every update, in read order
+        return [
+            block
+            for block in ("status", "settings", "dynamic", "commands")
+            if ups.reads_block(block)
+        ]
+
+    def fetch_register_support(self, ups: ApcUps) -> dict:
+        # Models with the same firmware support the same registers, so the
+        # probe is done once per model and firmware version
+        key = f"{ups.inventory_data.model}/{ups.inventory_data.fw_version}"
+        register_support = self.register_support.get(key)
+        if register_support is None and self.inventory_cache is not None:
+            register_support = self.inventory_cache.load(f"register_support/{key}")
+        if register_support is not None:
+            ups.set_register_support(register_support)
+            self.register_support[key] = register_support
+            return register_support
+
+        previous = ups.register_support
+        with self.tracer.span(f"probe {ups.name}"):
+            if previous is None:
+                register_support = ups.probe_register_support()
+            else:
+                # Probe again only the blocks which failed on previous probe
+                probed = ups.probe_register_support(previous["unknown"])
+                register_support = {
+                    "modbus_map_id": previous["modbus_map_id"],
+                    "blocks": previous["blocks"] + probed["blocks"],
+                    "fields": previous["fields"] + probed["fields"],
+                    "unknown": probed["unknown"],
+                }
+        ups.set_register_support(register_support)
+        if register_support["unknown"]:
+            # Incomplete result is not shared or cached
+            return register_support
+
+        self.logger.info(
+            f"Register support of {key} "
+            f"(map {register_support['modbus_map_id']}): "
+            f"unsupported blocks {register_support['blocks']}, "
+            f"unsupported fields {register_support['fields']}"
+        )
+        if self.inventory_cache is not None:
+            self.inventory_cache.save(f"register_support/{key}", register_support)
+        self.register_support[key] = register_support
+        return register_support
+
+    def fetch_inventory_data(self, ups: ApcUps) -> InventoryData:
+        if self.inventory_cache is None:
+            return ups.fetch_inventory_data()
+
+        if cached := self.inventory_cache.load(ups.name):
+            try:
+                if inventory_data := ups.restore_inventory_data(
+                    cached["inventory"], cached["capabilities"]
+                ):
+                    self.logger.debug(f"Inventory data restored from cache: {ups.name}")
+                    return inventory_data
+            except (KeyError, TypeError) as e:
+                self.logger.warning(f"Invalid inventory cache for {ups.name}: {e}")
+
+        inventory_data = ups.fetch_inventory_data()
+        self.inventory_cache.save(
+            ups.name,
+            {
+                "inventory": asdict(inventory_data),
+                "capabilities": ups.get_capabilities(),
+            },
+        )
+        return inventory_data
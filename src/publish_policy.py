@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+import time
+import zlib
+
+
+@dataclass(frozen=True)
+class PublishPolicy:
+    min_interval: float = 0
+    max_interval: float = 300
+    on_change: bool = True
+
+
+class PublishPolicies:
+    def __init__(self, default: PublishPolicy, rules: list[tuple[str, PublishPolicy]]):
+        self.default = default
+        self.rules = rules
+        self._policies = {}
+
+    @classmethod
+    def parse(cls, spec: str | None, default: PublishPolicy) -> "PublishPolicies":
+        # Format: <glob>:<option>=<value>,...;<glob>:<option>=<value>,...
+        # e.g. "fw_version:max=86400;runtime_*:min=10,max=60;*_countdown:on_change=0"
+        rules = []
+        for rule in (spec or "").split(";"):
+            if not rule.strip():
+                continue
+            pattern, _, options = rule.partition(":")
+            rules.append((pattern.strip(), cls._parse_options(options, default)))
+        return cls(default, rules)
+
+    @staticmethod
+    def _parse_options(options: str, default: PublishPolicy) -> PublishPolicy:
+        values = {
+            "min": default.min_interval,
+            "max": default.max_interval,
+            "on_change": default.on_change,
+        }
+        for option in options.split(","):
+            if not option.strip():
+                continue
+            name, _, value = option.partition("=")
+            name = name.strip()
+            if name not in values:
+                raise ValueError(f"Unknown publish policy option '{name}'")
+            if name == "on_change":
+                values[name] = value.strip().lower() in ("1", "true", "yes", "on")
+            else:
+                values[name] = float(value)
+        return PublishPolicy(
+            min_interval=values["min"],
+            max_interval=values["max"],
+            on_change=values["on_change"],
+        )
+
+    def get(self, field: str) -> PublishPolicy:
+        if (policy := self._policies.get(field)) is None:
+            policy = next(
+                (p for pattern, p in self.rules if fnmatchcase(field, pattern)),
+                self.default,
+            )
+            self._policies[field] = policy
+        return policy
+
+
+class HeartbeatScheduler:
+    # Spread heartbeat republishes evenly over the interval. Every key gets a
+    # stable, hash based phase offset, and its cache TTL runs until the next
+    # phase aligned slot instead of a full interval from the publish time.
+    def __init__(self):
+        self._phases = {}
+
+    def _phase(self, key: str) -> float:
+        if (phase := self._phases.get(key)) is None:
+            phase = zlib.crc32(key.encode()) / 0x100000000
+            self._phases[key] = phase
+        return phase
+
+    def ttl(self, key: str, interval: float, now: float | None = None) -> float:
+        if interval <= 0:
+            return 0
+        now = time.time() if now is None else now
+        return interval - (now + self._phase(key) * interval) % interval or interval
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+import logging
+import threading
+from typing import Callable
+
+
+class PublishQueue:
+    # Bounded queue of pending MQTT publishes, sent by a dedicated thread.
+    # Pending value of a topic is replaced by a newer one, so the queue never
+    # holds more than one message per topic, unless collapsing is disabled
+    # for the message. Replaced values are reported to on_collapse. When the
+    # queue is full, put waits for room once. After a timeout, messages are
+    # dropped without waiting until the queue has drained, so a stalled
+    # broker delays the polling thread at most put_timeout.
+    def __init__(
+        self,
+        publish: Callable[[str, str, bool], None],
+        maxsize: int = 1024,
+        batch_size: int = 64,
+        put_timeout: float = 1.0,
+        on_collapse: Callable[[], None] = None,
+        logger=None,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.publish = publish
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.on_collapse = on_collapse
+        self._overflow = False
+        self._sequence = 0
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="publish-queue", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def put(
+        self, topic: str, value: str, retain: bool = False, collapse: bool = True
+    ) -> bool:
+        with self._cond:
+            key = topic
+            collapsed = False
+            if not collapse:
+                self._sequence += 1
+                key = (topic, self._sequence)
+            elif topic in self._pending:
+                collapsed = True
+            if not collapsed and not self._wait_for_room():
+                self.logger.warning(f"Publish queue full, drop {topic} = {value}")
+                return False
+            self._pending[key] = (topic, value, retain)
+            self._cond.notify_all()
+        if collapsed and self.on_collapse is not None:
+            self.on_collapse()
+        return True
+
+    def _wait_for_room(self) -> bool:
+        if len(self._pending) < self.maxsize:
+            return True
+        if not self._overflow:
+            self._overflow = not self._cond.wait_for(
+                lambda: len(self._pending) < self.maxsize, self.put_timeout
+            )
+        return not self._overflow
+
+    def _take_batch(self) -> list[tuple[str, str, bool]] | None:
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or not self._running)
+            if not self._pending:
+                return None
+            batch = [
+                self._pending.popitem(last=False)[1]
+                for _ in range(min(self.batch_size, len(self._pending)))
+            ]
+            if not self._pending:
+                self._overflow = False
+            self._cond.notify_all()
+            return batch
+
+    def _run(self) -> None:
+        while (batch := self._take_batch()) is not None:
+            for topic, value, retain in batch:
+                try:
+                    self.publish(topic, value, retain)
+                except Exception as e:
+                    self.logger.error(f"Failed to publish {topic}: {e}")
@@ -0,0 +1,64 @@
+import logging
+import threading
+import time
+from typing import Callable
+
+
+class FixedRateScheduler:
+    # Runs a task on fixed phase ticks of the monotonic clock. Ticks are
+    # aligned once to wall clock multiples of the interval, so instances
+    # sample at the same moments. Time spent in the task does not shift
+    # later ticks, ticks missed because of a long task are skipped and
+    # reported to on_missed.
+    def __init__(
+        self,
+        interval: float,
+        task: Callable[[], None],
+        on_missed: Callable[[int], None] = None,
+        logger=None,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.interval = interval
+        self.task = task
+        self.on_missed = on_missed
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="poll-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def first_tick(self, now: float = None, wall: float = None) -> float:
+        now = time.monotonic() if now is None else now
+        wall = time.time() if wall is None else wall
+        return now + (-wall) % self.interval
+
+    def next_tick(self, tick: float, now: float) -> float:
+        tick += self.interval
+        if now >= tick:
+            missed = int((now - tick) // self.interval) + 1
+            self.logger.warning(f"Update overran, skip {missed} missed tick(s)")
+            if self.on_missed is not None:
+                self.on_missed(missed)
+            tick += missed * self.interval
+        return tick
+
+    def _run(self) -> None:
+        tick = self.first_tick()
+        while not self._stop.wait(max(0, tick - time.monotonic())):
+            try:
+                self.task()
+            except Exception as e:
+                self.logger.exception(f"Scheduled update failed: {e}")
+            tick = self.next_tick(tick, time.monotonic())
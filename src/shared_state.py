@@ -0,0 +1,132 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+
+from sinks import Sink
+
+# Layout of the shared state file, all integers little endian:
+#   file header: magic, version, slot count, slot size
+#   slots:       sequence, timestamp, unit, payload length, JSON payload
+# Sequence is odd while the writer updates the slot.
+MAGIC = b"APCSTATE"
+VERSION = 1
+FILE_HEADER = struct.Struct("<8sIII")
+SLOT_HEADER = struct.Struct("<Qd32sI")
+SEQUENCE = struct.Struct("<Q")
+SLOT_FIELDS = struct.Struct("<d32sI")
+HEADER_SIZE = 64
+
+
+class SharedStateSink(Sink):
+    # Keeps the latest values of each UPS in a memory mapped file, so local
+    # readers get current state without MQTT. Each UPS has a fixed size
+    # slot guarded by a sequence counter (seqlock): readers retry when the
+    # counter is odd or changed during the read. Values of each cycle are
+    # merged into the last known values, so values of blocks not read in the
+    # cycle stay in the slot.
+    def __init__(self, path: str, slots: int, slot_size: int = 8192, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        if slot_size <= SLOT_HEADER.size:
+            raise ValueError(
+                f"Shared state slot size must exceed {SLOT_HEADER.size} bytes"
+            )
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.units = {}
+        self.values = {}
+        # Readers may have the previous file mapped, so the file is replaced
+        # instead of truncated
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.truncate(HEADER_SIZE + slots * slot_size)
+            f.write(FILE_HEADER.pack(MAGIC, VERSION, slots, slot_size))
+        os.replace(tmp, path)
+        with open(path, "r+b") as f:
+            self.mm = mmap.mmap(f.fileno(), 0)
+
+    def write(self, unit: str, values: dict[str, str], timestamp: float) -> None:
+        unit_values = self.values.setdefault(unit, {})
+        unit_values.update(values)
+        payload = json.dumps(unit_values, separators=(",", ":")).encode()
+        if len(payload) > self.slot_size - SLOT_HEADER.size:
+            self.logger.warning(
+                f"Shared state of {unit} is {len(payload)} bytes, "
+                f"exceeds slot size {self.slot_size}"
+            )
+            return
+        if (offset := self._get_slot(unit)) is None:
+            return
+        seq = SEQUENCE.unpack_from(self.mm, offset)[0]
+        SEQUENCE.pack_into(self.mm, offset, seq + 1)
+        SLOT_FIELDS.pack_into(
+            self.mm,
+            offset + SEQUENCE.size,
+            timestamp,
+            unit.encode()[:32],
+            len(payload),
+        )
+        start = offset + SLOT_HEADER.size
+        self.mm[start : start + len(payload)] = payload
+        SEQUENCE.pack_into(self.mm, offset, seq + 2)
+
+    def _get_slot(self, unit: str) -> int | None:
+        if unit not in self.units:
+            if len(self.units) == self.slots:
+                self.logger.warning(f"No free shared state slot for {unit}")
+                return None
+            self.units[unit] = HEADER_SIZE + len(self.units) * self.slot_size
+        return self.units[unit]
+
+    def close(self) -> None:
+        self.mm.close()
+
+
+class SharedStateReader:
+    # Lock free reader of the file written by SharedStateSink
+    def __init__(self, path: str, retries: int = 1000):
+        self.retries = retries
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.slots, self.slot_size = FILE_HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f"Unsupported shared state file {path}")
+
+    def units(self) -> list[str]:
+        return [unit for unit, _ in self._iter_slots()]
+
+    def read(self, unit: str) -> tuple[float, dict[str, str]] | None:
+        for name, offset in self._iter_slots():
+            if name == unit:
+                return self._read_slot(offset)
+        return None
+
+    def read_all(self) -> dict[str, tuple[float, dict[str, str]]]:
+        return {unit: self._read_slot(offset) for unit, offset in self._iter_slots()}
+
+    def _iter_slots(self):
+        for i in range(self.slots):
+            offset = HEADER_SIZE + i * self.slot_size
+            unit = SLOT_HEADER.unpack_from(self.mm, offset)[2].rstrip(b"\0")
+            if not unit:
+                break
+            yield unit.decode(), offset
+
+    def _read_slot(self, offset: int) -> tuple[float, dict[str, str]]:
+        for _ in range(self.retries):
+            seq, timestamp, _, length = SLOT_HEADER.unpack_from(self.mm, offset)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            start = offset + SLOT_HEADER.size
+            payload = self.mm[start : start + length]
+            if SEQUENCE.unpack_from(self.mm, offset)[0] == seq:
+                return timestamp, json.loads(payload)
+        raise TimeoutError("Shared state slot is not consistent")
+
+    def close(self) -> None:
+        self.mm.close()
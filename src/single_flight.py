@@ -0,0 +1,44 @@
+import threading
+from typing import Callable
+
+
+class SingleFlight:
+    # Runs at most one call of a function at a time. A request arriving while
+    # a call is in flight joins it, or when it needs a follow-up, queues one
+    # more call with its argument. Requests arriving while a follow-up is
+    # already queued join the follow-up. The follow-up is run by the thread
+    # which ran the call in flight. Joined requests are reported to on_join.
+    def __init__(
+        self, fn: Callable[[object], None], on_join: Callable[[], None] = None
+    ):
+        self.fn = fn
+        self.on_join = on_join
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending = None
+
+    def run(self, arg, follow_up: bool = False) -> bool:
+        with self._lock:
+            if self._running:
+                joined = not follow_up or self._pending is not None
+                if not joined:
+                    self._pending = arg
+            else:
+                self._running = True
+                joined = None
+        if joined is not None:
+            if joined and self.on_join is not None:
+                self.on_join()
+            return False
+
+        try:
+            while True:
+                self.fn(arg)
+                with self._lock:
+                    if self._pending is None:
+                        return True
+                    arg, self._pending = self._pending, None
+        finally:
+            with self._lock:
+                self._running = False
+                self._pending = None
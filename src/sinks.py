@@ -0,0 +1,205 @@
+from abc import ABC, abstractmethod
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+
+
+class Sink(ABC):
+    # Receives all values of a UPS once per update cycle, in addition to
+    # MQTT publishing
+    @abstractmethod
+    def write(self, unit: str, values: dict[str, str], timestamp: float) -> None:
+        pass
+
+    def flush(self, force: bool = False) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+_INFLUX_ESCAPES = str.maketrans({",": r"\,", " ": r"\ ", "=": r"\=", "\n": r"\n"})
+
+
+def _influx_escape(value: str) -> str:
+    return value.translate(_INFLUX_ESCAPES)
+
+
+def _influx_field(value: str, field_type: type) -> str:
+    # Field type must not change between lines, so it is taken from the
+    # data model instead of the value
+    if field_type is bool:
+        return value.lower()
+    if field_type is int:
+        return f"{value}i"
+    if field_type is float:
+        return value
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+class InfluxLineEncoder:
+    # Fields of int, float and bool type are written as integers, floats
+    # and booleans, others as strings
+    def __init__(self, measurement: str = "ups", field_types: dict[str, type] = None):
+        self.measurement = _influx_escape(measurement)
+        self.field_types = field_types or {}
+
+    def encode(self, unit: str, values: dict[str, str], timestamp: float) -> str:
+        fields = ",".join(
+            f"{_influx_escape(key)}={_influx_field(value, self.field_types.get(key))}"
+            for key, value in values.items()
+        )
+        tags = f"{self.measurement},unit={_influx_escape(unit)}"
+        return f"{tags} {fields} {int(timestamp * 1e9)}\n"
+
+
+class NdjsonEncoder:
+    def encode(self, unit: str, values: dict[str, str], timestamp: float) -> str:
+        return json.dumps({"unit": unit, "time": timestamp, **values}) + "\n"
+
+
+class StreamOutput:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write(self, data: str) -> None:
+        self.stream.write(data)
+        self.stream.flush()
+
+    def close(self) -> None:
+        pass
+
+
+class FileOutput:
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.file = None
+
+    def write(self, data: str) -> None:
+        if self.file is None:
+            self.file = open(self.filename, "a", encoding="utf-8")
+        self.file.write(data)
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class UnixSocketOutput:
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self.socket = None
+
+    def write(self, data: str) -> None:
+        if self.socket is None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(self.timeout)
+            try:
+                self.socket.connect(self.path)
+            except OSError:
+                self.close()
+                raise
+        try:
+            self.socket.sendall(data.encode("utf-8"))
+        except OSError:
+            # Reconnect on next write
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+
+class BatchWriter(Sink):
+    # Buffers encoded lines and writes them with one write on flush, at most
+    # once per flush_interval. With flush_interval, buffered lines are also
+    # flushed by a timer, so they are written when update cycles stop.
+    def __init__(self, encoder, output, flush_interval: float = 0, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.encoder = encoder
+        self.output = output
+        self.flush_interval = flush_interval
+        self.last_flush = 0
+        self.buffer = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def write(self, unit: str, values: dict[str, str], timestamp: float) -> None:
+        line = self.encoder.encode(unit, values, timestamp)
+        with self._lock:
+            self.buffer.append(line)
+        if self.flush_interval > 0 and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="sink-flush", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self, force: bool = False) -> None:
+        with self._lock:
+            if not self.buffer:
+                return
+            now = time.monotonic()
+            if not force and now - self.last_flush < self.flush_interval:
+                return
+            self.last_flush = now
+            data = "".join(self.buffer)
+            self.buffer.clear()
+            try:
+                self.output.write(data)
+            except OSError as e:
+                self.logger.error(f"Failed to write {len(data)} bytes to sink: {e}")
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(force=True)
+        self.output.close()
+
+
+def parse_sinks(
+    spec: str,
+    measurement: str = "ups",
+    flush_interval: float = 0,
+    field_types: dict[str, type] = None,
+    logger=None,
+) -> list[Sink]:
+    # Format: <influx|ndjson>:<stdout|file:<path>|unix:<path>>,...
+    # e.g. "influx:unix:/run/telegraf.sock,ndjson:file:/data/ups.ndjson"
+    sinks = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        encoding, _, target = item.strip().partition(":")
+        kind, _, path = target.partition(":")
+        if encoding == "influx":
+            encoder = InfluxLineEncoder(measurement, field_types)
+        elif encoding == "ndjson":
+            encoder = NdjsonEncoder()
+        else:
+            raise ValueError(f"Unknown sink encoding '{encoding}'")
+        if kind == "stdout":
+            output = StreamOutput()
+        elif kind == "file" and path:
+            output = FileOutput(path)
+        elif kind == "unix" and path:
+            output = UnixSocketOutput(path)
+        else:
+            raise ValueError(f"Unknown sink target '{target}'")
+        sinks.append(BatchWriter(encoder, output, flush_interval, logger=logger))
+    return sinks
@@ -0,0 +1,65 @@
+from dataclasses import fields, is_dataclass
+import json
+
+import msgpack
+
+
+class SnapshotEncoder:
+    # Encodes a whole data block as one message. Field order is the order of
+    # the dataclass fields, which is published as a schema. In msgpack
+    # encoding the block is an array in schema order and converters are
+    # [raw, value] pairs.
+    ENCODINGS = ("json", "msgpack")
+    SCHEMA_VERSION = 1
+
+    def __init__(self, encoding: str = "json"):
+        if encoding not in self.ENCODINGS:
+            raise ValueError(f"Unknown snapshot encoding '{encoding}'")
+        self.encoding = encoding
+        self._fields = {}
+
+    def get_fields(self, cls) -> tuple[str, ...]:
+        if cls not in self._fields:
+            self._fields[cls] = tuple(f.name for f in fields(cls))
+        return self._fields[cls]
+
+    def get_schema(self, cls) -> str:
+        schema = []
+        for f in fields(cls):
+            field_type = getattr(f.type, "__name__", str(f.type))
+            if is_dataclass(f.type):
+                schema.append(
+                    {"name": f.name, "type": field_type, "items": ["raw", "value"]}
+                )
+            else:
+                schema.append({"name": f.name, "type": field_type})
+        return json.dumps(
+            {
+                "version": self.SCHEMA_VERSION,
+                "encoding": self.encoding,
+                "block": cls.__name__,
+                "fields": schema,
+            }
+        )
+
+    def encode(self, data) -> str | bytes:
+        names = self.get_fields(type(data))
+        if self.encoding == "msgpack":
+            return msgpack.packb(
+                [self._pack(getattr(data, name)) for name in names],
+                use_single_float=True,
+            )
+        return json.dumps(
+            {name: self._to_json(getattr(data, name)) for name in names},
+            separators=(",", ":"),
+        )
+
+    def _pack(self, value):
+        if is_dataclass(value):
+            return [value.raw, value.value]
+        return value
+
+    def _to_json(self, value):
+        if is_dataclass(value):
+            return {"raw": value.raw, "value": value.value}
+        return value
@@ -0,0 +1,109 @@
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+import time
+
+
+class Tracer:
+    # Lightweight span tracing of update cycles. Spans are recorded only
+    # inside a cycle and only from the thread running the cycle. Finished
+    # cycles are kept in a bounded ring.
+    def __init__(self, max_traces: int = 20):
+        self.traces = deque(maxlen=max_traces)
+        self._current = None
+        self._stack = []
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def cycle(self, name: str, **attrs):
+        if self.traces.maxlen == 0 or self._current is not None:
+            yield
+            return
+        self._thread = threading.get_ident()
+        self._current = {
+            "name": name,
+            "start": datetime.now().isoformat(),
+            "attrs": attrs,
+            "spans": [],
+        }
+        self._stack = []
+        start = time.perf_counter()
+        self._current["_t0"] = start
+        try:
+            yield
+        finally:
+            trace = self._current
+            self._current = None
+            trace["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            del trace["_t0"]
+            self._set_self_times(trace["spans"])
+            with self._lock:
+                self.traces.append(trace)
+
+    @contextmanager
+    def span(self, name: str):
+        trace = self._current
+        if trace is None or threading.get_ident() != self._thread:
+            yield
+            return
+        span = {
+            "name": name,
+            "depth": len(self._stack),
+            "parent": self._stack[-1] if self._stack else None,
+        }
+        trace["spans"].append(span)
+        self._stack.append(len(trace["spans"]) - 1)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._stack.pop()
+            span["start_ms"] = round((start - trace["_t0"]) * 1000, 3)
+            span["duration_ms"] = round((end - start) * 1000, 3)
+
+    def _set_self_times(self, spans: list[dict]) -> None:
+        # Time not covered by child spans, e.g. decoding inside a fetch span
+        for span in spans:
+            span["self_ms"] = span["duration_ms"]
+        for span in spans:
+            if span["parent"] is not None:
+                spans[span["parent"]]["self_ms"] -= span["duration_ms"]
+        for span in spans:
+            span["self_ms"] = round(span["self_ms"], 3)
+
+    def get_traces(self, count: int | None = None) -> list[dict]:
+        with self._lock:
+            traces = list(self.traces)
+        return traces[-count:] if count else traces
+
+    def to_chrome_trace(self, count: int | None = None) -> dict:
+        events = []
+        offset = 0.0
+        for trace in self.get_traces(count):
+            events.append(
+                {
+                    "name": trace["name"],
+                    "ph": "X",
+                    "ts": offset,
+                    "dur": trace["duration_ms"] * 1000,
+                    "pid": 1,
+                    "tid": 1,
+                    "args": {"start": trace["start"], **trace["attrs"]},
+                }
+            )
+            events.extend(
+                {
+                    "name": span["name"],
+                    "ph": "X",
+                    "ts": offset + span["start_ms"] * 1000,
+                    "dur": span["duration_ms"] * 1000,
+                    "pid": 1,
+                    "tid": 1,
+                }
+                for span in trace["spans"]
+            )
+            offset += trace["duration_ms"] * 1000 + 1000
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
@@ -0,0 +1,62 @@
+import random
+import time
+
+import pytest
+from pyModbusTCP.constants import EXP_DATA_ADDRESS
+
+
+class FakeModbusClient:
+    # GatewayUnitClient like client serving random registers. Addresses in
+    # fail return no response, addresses in illegal return illegal data
+    # address exception, silent client waits until the timeout.
+    def __init__(self, host: str = "127.0.0.1", port: int = 502, seed: int = 1):
+        self.host = host
+        self.port = port
+        self.seed = seed
+        self.registers = None
+        self.fail = set()
+        self.illegal = set()
+        self.silent = False
+        self.last_except = 0
+        self.reads = []
+        self.requests = []
+
+    def get_registers(self) -> list[int]:
+        if self.registers is None:
+            rnd = random.Random(self.seed)
+            self.registers = [rnd.randint(0, 65535) for _ in range(2100)]
+            serial_number = f"AS{self.seed:010d}".encode().ljust(16, b"\0")
+            for i in range(8):
+                self.registers[564 + i] = (
+                    serial_number[2 * i] << 8 | serial_number[2 * i + 1]
+                )
+            # Master outlet group and outlet group 0 present
+            self.registers[590] = 0b11
+        return self.registers
+
+    def open(self, timeout: float = None) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+    def read_holding_registers(
+        self, reg_addr: int, reg_nb: int, timeout: float = None
+    ) -> list[int] | None:
+        self.reads.append(reg_addr)
+        self.requests.append((reg_addr, reg_nb))
+        self.last_except = 0
+        if self.silent:
+            time.sleep(timeout or 0)
+            return None
+        if reg_addr in self.fail:
+            return None
+        if reg_addr in self.illegal:
+            self.last_except = EXP_DATA_ADDRESS
+            return None
+        return self.get_registers()[reg_addr : reg_addr + reg_nb]
+
+
+@pytest.fixture
+def fake_client():
+    return FakeModbusClient
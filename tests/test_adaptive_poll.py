@@ -0,0 +1,57 @@
+import pytest
+
+from adaptive_poll import AdaptivePollRate
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("adaptive_poll.time.monotonic", lambda: clock[0])
+    return clock
+
+
+def run_updates(poll_rate: AdaptivePollRate, clock: list, end: float) -> list[float]:
+    # Framework update every 10 seconds, returns the gaps between polls
+    polls = []
+    while clock[0] < end:
+        if poll_rate.should_poll():
+            poll_rate.polled()
+            polls.append(clock[0])
+        clock[0] += 10
+    return [b - a for a, b in zip(polls, polls[1:])]
+
+
+def test_interval_grows_gradually(clock):
+    poll_rate = AdaptivePollRate(max_interval=60, stable_time=300)
+    gaps = run_updates(poll_rate, clock, 700)
+    assert gaps == [10] * 32 + [20, 40, 60, 60, 60, 60, 60]
+    assert poll_rate.get_poll_interval() == 60
+
+
+def test_change_returns_to_every_update(clock):
+    poll_rate = AdaptivePollRate(max_interval=60, stable_time=300)
+    poll_rate.update("ups1/ups_status", "['Online']")
+    run_updates(poll_rate, clock, 700)
+    # Poll sees the change
+    clock[0] = poll_rate.last_poll + 60
+    poll_rate.polled()
+    poll_rate.update("ups1/ups_status", "['Online', 'Test']")
+    assert poll_rate.get_poll_interval() == 0
+    assert run_updates(poll_rate, clock, clock[0] + 100)[:3] == [10, 10, 10]
+
+
+def test_alert_and_load_change(clock):
+    poll_rate = AdaptivePollRate(max_interval=60, stable_time=0, load_change=10)
+    clock[0] = 100
+    assert poll_rate.get_interval() == 60
+    poll_rate.update("ups1/output0_real_power_pct", "20.0")
+    poll_rate.update("ups1/output0_real_power_pct", "25.0")
+    assert poll_rate.get_interval(200) == 60
+    poll_rate.update("ups1/output0_real_power_pct", "35.0")
+    assert poll_rate.last_event == 100
+    poll_rate.update("ups1/ups_status", "['OnBattery']")
+    assert poll_rate.get_interval(1000) == 0
+    poll_rate.update("ups1/ups_status", "['Online']")
+    assert poll_rate.get_interval(1000) == 60
+    poll_rate.update("ups1/mog_turn_off_countdown", "30")
+    assert poll_rate.get_interval(1000) == 0
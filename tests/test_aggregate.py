@@ -0,0 +1,49 @@
+import pytest
+
+from aggregate import SiteAggregator
+
+
+def test_parse():
+    aggregator = SiteAggregator.parse(
+        "sum:output0_real_power_w, count:ups_status=OnBattery,"
+    )
+    assert [(a.op, a.field, a.match) for a in aggregator.aggregates] == [
+        ("sum", "output0_real_power_w", ""),
+        ("count", "ups_status", "OnBattery"),
+    ]
+    assert list(aggregator.get_values()) == [
+        "output0_real_power_w_sum",
+        "ups_status_OnBattery_count",
+    ]
+
+
+def test_parse_aggregates_values():
+    aggregator = SiteAggregator.parse("sum:load,max:load,count:status=OnBattery")
+    aggregator.update("ups1/load", "10.5")
+    aggregator.update("ups2/load", "20.0")
+    aggregator.update("ups1/status", "['Online']")
+    aggregator.update("ups2/status", "['OnBattery']")
+    assert aggregator.get_values() == {
+        "load_sum": 30.5,
+        "load_max": 20.0,
+        "status_OnBattery_count": 1,
+    }
+
+
+def test_parse_invalid():
+    with pytest.raises(ValueError):
+        SiteAggregator.parse("avg:load")
+    with pytest.raises(ValueError):
+        SiteAggregator.parse("count:ups_status")
+
+
+def test_remove_unit():
+    aggregator = SiteAggregator.parse("min:runtime,count:status=OnBattery")
+    aggregator.update("ups1/runtime", "10")
+    aggregator.update("ups2/runtime", "20")
+    aggregator.update("ups1/status", "['OnBattery']")
+    aggregator.remove("ups1", ["runtime"])
+    assert aggregator.get_values() == {"runtime_min": 20.0, "status_OnBattery_count": 1}
+    aggregator.remove("ups1")
+    aggregator.remove("ups2")
+    assert aggregator.get_values() == {"runtime_min": None, "status_OnBattery_count": 0}
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from apcups import ApcUps
+from apcups_data import CommunicationError, DeadlineExceededError
+from field_filter import FieldFilter
+
+
+def test_deadline_with_modbus_client():
+    # Default ModbusClient takes no timeout, connection is refused
+    ups = ApcUps("127.0.0.1", port=1)
+    ups.deadline = time.monotonic() + 5
+    with pytest.raises(CommunicationError):
+        ups.open_connection()
+    with pytest.raises(CommunicationError):
+        ups.fetch_serial_number()
+
+
+def test_deadline_exceeded(fake_client):
+    ups = ApcUps("ups", client=fake_client())
+    ups.deadline = time.monotonic() - 1
+    with pytest.raises(DeadlineExceededError):
+        ups.fetch_serial_number()
+
+
+def test_probe_register_support(fake_client):
+    client = fake_client()
+    ups = ApcUps("ups", client=client)
+    client.illegal.add(1536)
+    client.fail.add(1024)
+    registers = client.get_registers()
+    registers[128:130] = [0xFFFF, 0xFFFF]
+    registers[136] = 0x1234
+    register_support = ups.probe_register_support()
+    assert register_support["blocks"] == ["commands"]
+    assert register_support["unknown"] == ["settings"]
+    assert "runtime_remaining_s" in register_support["fields"]
+    assert "output0_real_power_pct" not in register_support["fields"]
+
+    # Only the given blocks are probed, without the Modbus map
+    client.reads.clear()
+    client.fail.clear()
+    register_support = ups.probe_register_support(["settings"])
+    assert register_support["modbus_map_id"] is None
+    assert register_support["blocks"] == []
+    assert register_support["unknown"] == []
+    assert client.reads == [1024]
+
+
+def test_unsupported_block_and_field_are_not_read(fake_client):
+    client = fake_client()
+    ups = ApcUps("ups", client=client)
+    ups.set_register_support(
+        {"blocks": ["commands"], "fields": ["runtime_remaining_s"], "unknown": []}
+    )
+    assert not ups.reads_block("commands")
+    assert ups.reads_block("dynamic")
+    assert ups.fetch_dynamic_data().runtime_remaining_s is None
+
+
+def test_excluded_fields_trim_read_range(fake_client):
+    client = fake_client()
+    ups = ApcUps(
+        "ups",
+        client=client,
+        field_filter=FieldFilter.parse(
+            None, "ups_status*,battery_life_time_status,user_interface_status"
+        ),
+    )
+    ups.fetch_inventory_data()
+    client.requests.clear()
+    data = ups.fetch_status_data()
+    # Status block is 0-26, first selected field is mog_outlet_status at 3 and
+    # last runtime_calibration_status at 24
+    assert client.requests == [(3, 22)]
+    assert data.ups_status is None
+    assert data.ups_status_change_cause is None
+    assert data.battery_life_time_status is None
+    assert data.user_interface_status is None
+
+    expected = ApcUps("ups", client=fake_client()).fetch_status_data()
+    assert data.mog_outlet_status == expected.mog_outlet_status
+    assert data.runtime_calibration_status == expected.runtime_calibration_status
+
+
+def test_block_without_selected_fields_is_not_read(fake_client):
+    ups = ApcUps(
+        "ups", client=fake_client(), field_filter=FieldFilter.parse("ups_status", None)
+    )
+    assert ups.reads_block("status")
+    assert not ups.reads_block("dynamic")
+    assert not ups.reads_block("settings")
+    assert not ups.reads_block("commands")
+    ups.fetch_inventory_data()
+    ups.client.requests.clear()
+    ups.fetch_status_data()
+    assert ups.client.requests == [(0, 2)]
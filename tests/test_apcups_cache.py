@@ -0,0 +1,37 @@
+import multiprocessing
+
+from apcups_cache import InventoryCache
+
+
+def _save_entries(filename, worker):
+    cache = InventoryCache(filename)
+    for i in range(20):
+        cache.save(f"{worker}/{i}", {"value": i})
+
+
+def test_save_load_remove(tmp_path):
+    cache = InventoryCache(str(tmp_path / "cache.json"))
+    assert cache.load("ups") is None
+    cache.save("ups", {"serial_number": "AS1234"})
+    assert cache.load("ups") == {"serial_number": "AS1234"}
+    cache.remove("ups")
+    assert cache.load("ups") is None
+
+
+def test_concurrent_saves_keep_all_entries(tmp_path):
+    filename = str(tmp_path / "cache.json")
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_save_entries, args=(filename, worker))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    cache = InventoryCache(filename)
+    assert all(
+        cache.load(f"{worker}/{i}") == {"value": i}
+        for worker in range(4)
+        for i in range(20)
+    )
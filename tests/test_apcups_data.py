@@ -0,0 +1,41 @@
+from apcups_data import Date, Interned, UpsStatus, converter_cache_info
+
+
+def test_same_raw_value_is_same_instance():
+    assert Date(5) is Date(5)
+    assert Date(5) is not Date(6)
+    assert UpsStatus(5) is not Date(5)
+    assert Date(5).value == "2000-01-06T00:00:00"
+
+
+def test_cache_is_bounded():
+    for raw in range(1000, 1000 + 2 * Interned.maxsize):
+        Date(raw)
+    info = converter_cache_info()["Date"]
+    assert info.maxsize == Interned.maxsize
+    assert info.currsize == Interned.maxsize
+    # Oldest value was evicted and is created again
+    Date(1000)
+    assert converter_cache_info()["Date"].misses == info.misses + 1
+
+
+def test_cache_info_counts_hits_and_misses():
+    before = converter_cache_info()["UpsStatus"]
+    UpsStatus(0x7001)
+    UpsStatus(0x7001)
+    UpsStatus(0x7001)
+    after = converter_cache_info()["UpsStatus"]
+    assert after.misses - before.misses == 1
+    assert after.hits - before.hits == 2
+
+
+def test_interning_survives_slots_class_replacement():
+    # dataclass(slots=True) creates a new class, metaclass registers both
+    # under the same name, and only the final class is kept
+    assert [c for c in Interned.classes if c.__name__ == "Date"] == [Date]
+    assert hasattr(Date, "__slots__")
+    value = Date(42)
+    assert type(value) is Date
+    assert not hasattr(value, "__dict__")
+    assert Date(42) is value
+    assert len(converter_cache_info()) == len(Interned.classes)
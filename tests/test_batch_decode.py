@@ -0,0 +1,33 @@
+import pytest
+
+from apcups import ApcUps
+from field_filter import FieldFilter
+
+pytest.importorskip("numpy")
+from batch_decode import decode_dynamic_data  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "field_filter",
+    [
+        None,
+        FieldFilter(exclude=["battery_*", "sog*"]),
+        FieldFilter(include=["runtime_*", "output0_*", "input_efficiency"]),
+    ],
+)
+def test_batch_decode_matches_scalar_decode(fake_client, field_filter):
+    upses = []
+    for seed, sog_relay_config in enumerate((0b11, 0b1, 0b11111, 0b10101), 1):
+        client = fake_client(seed=seed)
+        client.get_registers()[590] = sog_relay_config
+        ups = ApcUps(f"ups{seed}", client=client, field_filter=field_filter)
+        ups.fetch_inventory_data()
+        upses.append(ups)
+
+    registers = [ups.read_block("dynamic") for ups in upses]
+    expected = [ups.fetch_dynamic_data() for ups in upses]
+    assert decode_dynamic_data(upses, registers) == expected
+
+
+def test_batch_decode_empty():
+    assert decode_dynamic_data([], []) == []
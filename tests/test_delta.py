@@ -0,0 +1,117 @@
+import pytest
+
+from delta import DeltaBuilder
+from publish_policy import HeartbeatScheduler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("delta.time.monotonic", lambda: clock[0])
+    monkeypatch.setattr("publish_policy.time.time", lambda: clock[0])
+    return clock
+
+
+class Publisher:
+    def __init__(self):
+        self.messages = []
+        self.accept = True
+
+    def __call__(self, topic: str, patch: dict[str, str], keyframe: bool) -> bool:
+        if self.accept:
+            self.messages.append((topic, dict(patch), keyframe))
+        return self.accept
+
+
+VALUES = {"AS1/runtime_s": "3600", "AS1/model": "SMT1500"}
+
+
+def test_keyframe_merges_pending_values(clock):
+    delta = DeltaBuilder(300)
+    publish = Publisher()
+    delta.add("AS1/runtime_s", "3500")
+    delta.add("AS1/stale", '["dynamic"]')
+    patch = delta.publish("AS1", VALUES, publish)
+    assert patch == {"runtime_s": "3500", "model": "SMT1500", "stale": '["dynamic"]'}
+    assert publish.messages == [("AS1/keyframe", patch, True)]
+
+
+def test_delta_has_only_pending_values(clock):
+    delta = DeltaBuilder(300)
+    publish = Publisher()
+    delta.publish("AS1", VALUES, publish)
+    assert delta.publish("AS1", VALUES, publish) == {}
+    delta.add("AS1/runtime_s", "3500")
+    delta.add("AS2/runtime_s", "100")
+    assert delta.publish("AS1", VALUES, publish) == {"runtime_s": "3500"}
+    assert publish.messages[-1] == ("AS1/delta", {"runtime_s": "3500"}, False)
+    assert delta.pending == {"AS2": {"runtime_s": "100"}}
+
+
+def test_keyframe_interval(clock):
+    heartbeat = HeartbeatScheduler()
+    delta = DeltaBuilder(300, heartbeat)
+    publish = Publisher()
+    delta.publish("AS1", VALUES, publish)
+    # First interval is shortened to the phase of the UPS
+    ttl = delta.next_keyframe["AS1"] - clock[0]
+    assert 0 < ttl <= 300
+    clock[0] += ttl - 1
+    assert not delta.is_keyframe_due("AS1")
+    clock[0] += 1
+    assert delta.publish("AS1", VALUES, publish) == {
+        "runtime_s": "3600",
+        "model": "SMT1500",
+    }
+    assert publish.messages[-1][0] == "AS1/keyframe"
+    # Next keyframe is at the same phase
+    assert delta.next_keyframe["AS1"] - clock[0] == pytest.approx(300, abs=1)
+
+
+def test_keyframe_only_after_reset_with_zero_interval(clock):
+    delta = DeltaBuilder(0)
+    publish = Publisher()
+    delta.publish("AS1", VALUES, publish)
+    assert not delta.is_keyframe_due("AS1", clock[0] + 1e9)
+    delta.reset()
+    assert delta.is_keyframe_due("AS1")
+
+
+def test_dropped_publish(clock):
+    delta = DeltaBuilder(300)
+    publish = Publisher()
+    publish.accept = False
+    # Dropped keyframe is still due, nothing is returned for the cache
+    assert delta.publish("AS1", VALUES, publish) == {}
+    assert delta.is_keyframe_due("AS1")
+    publish.accept = True
+    assert delta.publish("AS1", VALUES, publish) == {
+        "runtime_s": "3600",
+        "model": "SMT1500",
+    }
+    delta.add("AS1/runtime_s", "3500")
+    publish.accept = False
+    assert delta.publish("AS1", VALUES, publish) == {}
+    assert delta.pending == {}
+
+
+def test_removed_value_is_null(clock):
+    delta = DeltaBuilder(300)
+    publish = Publisher()
+    delta.publish("AS1", VALUES, publish)
+    delta.remove("AS1/model")
+    patch = delta.publish("AS1", {"AS1/runtime_s": "3600"}, publish)
+    assert patch == {"model": None}
+    assert publish.messages[-1] == ("AS1/delta", {"model": None}, False)
+
+    # Keyframe has no removed values
+    delta.remove("AS1/runtime_s")
+    delta.reset()
+    assert delta.publish("AS1", {"AS1/runtime_s": "3600"}, publish) == {
+        "runtime_s": "3600"
+    }
+    delta.remove("AS1/model")
+    clock[0] += 1000
+    assert delta.publish("AS1", {"AS1/runtime_s": "3600"}, publish) == {
+        "runtime_s": "3600"
+    }
@@ -0,0 +1,52 @@
+from apcups_data import StatusData, UpsStatus, UpsStatusChangeCause
+from events import EventLog, TransitionDetector
+
+ONLINE = 1 << 1
+ON_BATTERY = 1 << 2
+INPUT_BAD = 1 << 6
+
+
+def status_data(ups_status: int, cause: int) -> StatusData:
+    return StatusData(
+        UpsStatusChangeCause(cause),
+        UpsStatus(ups_status),
+        *[None] * 13,
+    )
+
+
+def test_no_events_on_first_sample():
+    detector = TransitionDetector()
+    assert detector.detect("AS1", status_data(ONLINE, 8)) == []
+    assert detector.detect("AS1", status_data(ONLINE, 8)) == []
+    assert detector.detect("AS2", status_data(ON_BATTERY, 2)) == []
+
+
+def test_set_and_cleared_flags():
+    detector = TransitionDetector()
+    detector.detect("AS1", status_data(ONLINE, 8))
+    events = detector.detect("AS1", status_data(ON_BATTERY | INPUT_BAD, 2))
+    assert [(e["flag"], e["from"], e["to"]) for e in events] == [
+        ("Online", True, False),
+        ("OnBattery", False, True),
+        ("InputBad", False, True),
+    ]
+    for event in events:
+        assert event["unit"] == "AS1"
+        assert event["field"] == "ups_status"
+        assert event["cause"] == "LowInputVoltage"
+        assert event["time"] == events[0]["time"]
+
+    events = detector.detect("AS1", status_data(ONLINE, 8))
+    assert [(e["flag"], e["to"], e["cause"]) for e in events] == [
+        ("OnBattery", False, "AcceptableInput"),
+        ("InputBad", False, "AcceptableInput"),
+        ("Online", True, "AcceptableInput"),
+    ]
+
+
+def test_event_log_keeps_latest():
+    log = EventLog(max_events=2)
+    log.add([{"flag": "a"}, {"flag": "b"}])
+    log.add([{"flag": "c"}])
+    assert log.get_events() == [{"flag": "b"}, {"flag": "c"}]
+    assert log.get_events(1) == [{"flag": "c"}]
@@ -0,0 +1,20 @@
+from field_filter import FieldFilter
+
+
+def test_parse():
+    field_filter = FieldFilter.parse(" ups_status, *_countdown ,", "sog3_*")
+    assert field_filter.include == ["ups_status", "*_countdown"]
+    assert field_filter.exclude == ["sog3_*"]
+
+
+def test_parse_empty_selects_all():
+    field_filter = FieldFilter.parse(None, "")
+    assert field_filter.matches("model")
+
+
+def test_matches():
+    field_filter = FieldFilter.parse("*_countdown,ups_status", "sog3_*")
+    assert field_filter.matches("ups_status")
+    assert field_filter.matches("mog_turn_off_countdown")
+    assert not field_filter.matches("sog3_turn_off_countdown")
+    assert not field_filter.matches("model")
@@ -0,0 +1,157 @@
+import logging
+import multiprocessing
+import queue
+import threading
+
+import pytest
+
+from apcups_data import StatusData, UpsStatus
+from fleet import FleetSupervisor, _to_fleet_result, _worker_main, shard_targets
+from poller import PollResult
+
+
+def test_shard_targets_keeps_gateway_units_together():
+    targets = [("gw", 502, 1), ("a", 502, 1), ("gw", 502, 2), ("gw", 502, 3)]
+    assert shard_targets(targets, 2) == [
+        [("gw", 502, 1), ("gw", 502, 2), ("gw", 502, 3)],
+        [("a", 502, 1)],
+    ]
+
+
+def test_shard_targets_spreads_gateways():
+    targets = [("a", 502, 1), ("b", 502, 1), ("c", 502, 1), ("a", 503, 1)]
+    assert shard_targets(targets, 2) == [
+        [("a", 502, 1), ("c", 502, 1)],
+        [("b", 502, 1), ("a", 503, 1)],
+    ]
+    assert shard_targets(targets[:1], 4) == [[("a", 502, 1)]]
+
+
+class FakeGateway:
+    def __init__(self, fake_client, host: str, port: int):
+        self.fake_client = fake_client
+        self.host = host
+        self.port = port
+
+    def unit(self, unit_id: int):
+        return self.fake_client(self.host, self.port, seed=unit_id)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def worker(fake_client, monkeypatch):
+    # Worker run in a thread, polling fake clients
+    monkeypatch.setattr(
+        "poller.ModbusGateway", lambda host, port: FakeGateway(fake_client, host, port)
+    )
+    # Worker configures the root logger of its process
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", list(root.handlers))
+    monkeypatch.setattr(root, "level", root.level)
+    conn, child_conn = multiprocessing.Pipe()
+    log_queue = queue.Queue()
+    thread = threading.Thread(
+        target=_worker_main,
+        args=(
+            [("ups", 502, 1), ("ups", 502, 2)],
+            child_conn,
+            None,
+            1,
+            True,
+            "json",
+            None,
+            0,
+            False,
+            log_queue,
+            logging.DEBUG,
+        ),
+        daemon=True,
+    )
+    thread.start()
+    yield conn
+    conn.send("stop")
+    thread.join(5)
+
+
+def request(conn, command: str):
+    conn.send(command)
+    assert conn.poll(10)
+    return conn.recv()
+
+
+def test_worker_sends_only_changes(worker):
+    assert request(worker, "inventory") == ["AS0000000001", "AS0000000002"]
+    results = request(worker, "poll")
+    assert [r.serial_number for r in results] == ["AS0000000001", "AS0000000002"]
+    for result in results:
+        assert result.error is None
+        assert result.blocks == [
+            "inventory",
+            "status",
+            "settings",
+            "dynamic",
+            "commands",
+        ]
+        assert f"{result.serial_number}/serial_number" in dict(result.values)
+        assert [block for block, _ in result.snapshots] == result.blocks
+        assert result.events == []
+
+    # Registers did not change
+    for result in request(worker, "poll"):
+        assert result.error is None
+        assert result.values == []
+        assert result.snapshots == []
+
+    # Reset sends all values again
+    assert request(worker, "reset") is None
+    for result in request(worker, "poll"):
+        assert f"{result.serial_number}/serial_number" in dict(result.values)
+        assert len(result.snapshots) == 5
+
+
+def test_supervisor_restarts_dead_worker(caplog):
+    logger = logging.getLogger("test_fleet.supervisor")
+    logger.setLevel(logging.DEBUG)
+    # Connection is refused
+    supervisor = FleetSupervisor(
+        [("127.0.0.1", 1, 1), ("127.0.0.2", 1, 1)], 2, tries=1, logger=logger
+    )
+    try:
+        assert [r.error is not None for r in supervisor.poll()] == [True, True]
+        assert supervisor.load_inventories() == []
+        process, _ = supervisor.workers[0]
+        process.kill()
+        process.join(5)
+        results = list(supervisor.poll())
+        assert len(results) == 2
+        assert all(result.error is not None for result in results)
+        # Dead worker is started again on next request
+        supervisor.reset()
+        assert supervisor.workers[0][0].is_alive()
+        assert supervisor.workers[0][0] is not process
+        assert len(list(supervisor.poll())) == 2
+    finally:
+        supervisor.stop()
+    # Worker records are handled by the supervisor logger
+    assert any(
+        r.name == "fleet.worker" and "Inventory read failed" in r.getMessage()
+        for r in caplog.records
+    )
+
+
+def test_removed_value_is_sent_as_none():
+    def result(ups_status):
+        data = StatusData(None, ups_status, *[None] * 13)
+        return PollResult("ups", "AS1", [("status", data)])
+
+    sent = {"AS2/ups_status": "x"}
+    values = _to_fleet_result(result(UpsStatus(2)), sent, None, None).values
+    assert [key for key, _ in values] == ["AS1/ups_status"]
+    assert _to_fleet_result(result(None), sent, None, None).values == [
+        ("AS1/ups_status", None)
+    ]
+    assert _to_fleet_result(result(None), sent, None, None).values == []
+    # Values of other units and blocks not read are kept
+    assert sent == {"AS2/ups_status": "x"}
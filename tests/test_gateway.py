@@ -0,0 +1,65 @@
+import socket
+
+import pytest
+from pyModbusTCP.server import DataBank, DataHandler, ModbusServer
+
+from gateway import ModbusGateway, parse_targets
+
+
+def test_parse_targets_host():
+    assert parse_targets("192.168.10.2") == [("192.168.10.2", 502, 1)]
+
+
+def test_parse_targets_host_port():
+    assert parse_targets("b:503") == [("b", 503, 1)]
+
+
+def test_parse_targets_host_port_unit_id():
+    assert parse_targets("a,b:503:2, c::3 ,") == [
+        ("a", 502, 1),
+        ("b", 503, 2),
+        ("c", 502, 3),
+    ]
+
+
+def test_parse_targets_invalid():
+    with pytest.raises(ValueError):
+        parse_targets("a:502:1:2")
+    with pytest.raises(ValueError):
+        parse_targets("a:port")
+
+
+class RecordingDataHandler(DataHandler):
+    def __init__(self):
+        super().__init__(DataBank())
+        self.requests = []
+
+    def read_h_regs(self, address, count, srv_info):
+        self.requests.append((srv_info.client.port, srv_info.recv_frame.mbap.unit_id))
+        return super().read_h_regs(address, count, srv_info)
+
+
+@pytest.fixture
+def modbus_server():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    handler = RecordingDataHandler()
+    server = ModbusServer("127.0.0.1", port, no_block=True, data_hdl=handler)
+    server.start()
+    yield port, handler
+    server.stop()
+
+
+def test_units_share_one_connection(modbus_server):
+    port, handler = modbus_server
+    gateway = ModbusGateway("127.0.0.1", port)
+    units = [gateway.unit(1), gateway.unit(2)]
+    for unit in units + units:
+        assert unit.open(timeout=1)
+        assert unit.read_holding_registers(0, 2, timeout=1) == [0, 0]
+        # Unit client does not close the shared connection
+        unit.close()
+    gateway.close()
+    assert [unit_id for _, unit_id in handler.requests] == [1, 2, 1, 2]
+    assert len({client_port for client_port, _ in handler.requests}) == 1
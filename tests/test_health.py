@@ -0,0 +1,72 @@
+import pytest
+
+from health import HealthMonitor
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("health.time.monotonic", lambda: clock[0])
+    return clock
+
+
+def test_no_data_is_fresh_until_max_age(clock):
+    health = HealthMonitor(max_age=300, max_latency=10)
+    status = health.get_status()
+    assert status["healthy"]
+    assert status["blocks"] == {}
+    assert status["latency_s"]["p95"] is None
+    clock[0] = 301
+    assert not health.is_healthy()
+
+
+def test_block_age(clock):
+    health = HealthMonitor(max_age=300, max_latency=10)
+    health.block_succeeded("ups1/status")
+    clock[0] = 200
+    health.block_succeeded("ups1/dynamic")
+    clock[0] = 400
+    status = health.get_status()
+    assert not status["fresh"]
+    assert status["blocks"]["ups1/status"]["age_s"] == 400
+    assert not status["blocks"]["ups1/status"]["fresh"]
+    assert status["blocks"]["ups1/dynamic"]["fresh"]
+    assert HealthMonitor(max_age=0, max_latency=0).is_healthy()
+
+
+def test_unit_never_read(clock):
+    health = HealthMonitor(max_age=300, max_latency=10, units=["ups1", "ups2"])
+    health.block_succeeded("ups1/status")
+    status = health.get_status()
+    assert status["healthy"]
+    assert status["waiting"] == ["ups2"]
+    clock[0] = 301
+    health.block_succeeded("ups1/status")
+    assert not health.is_healthy()
+    health.block_succeeded("ups2/status")
+    status = health.get_status()
+    assert status["healthy"]
+    assert status["waiting"] == []
+
+
+def test_latency_percentiles(clock):
+    health = HealthMonitor(max_age=300, max_latency=10)
+    for duration in range(1, 101):
+        health.cycle_completed(duration / 10)
+    status = health.get_status()
+    assert status["latency_s"] == {
+        "samples": 100,
+        "p50": 5.0,
+        "p95": 9.5,
+        "p99": 9.9,
+        "max": 10.0,
+    }
+    assert status["latency_ok"]
+    for _ in range(6):
+        health.cycle_completed(20)
+    assert not health.is_healthy()
+    # Window keeps the latest samples
+    health = HealthMonitor(max_age=300, max_latency=10, window=2)
+    for duration in (30, 1, 2):
+        health.cycle_completed(duration)
+    assert health.get_status()["latency_s"]["max"] == 2
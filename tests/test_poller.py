@@ -0,0 +1,125 @@
+from poller import UpsPoller
+
+
+def create_poller(fake_client, count: int, **kwargs) -> UpsPoller:
+    poller = UpsPoller([(f"ups{i}", 502, 1) for i in range(count)], **kwargs)
+    for i, ups in enumerate(poller.upses):
+        ups.client = fake_client(f"ups{i}", seed=i + 1)
+    return poller
+
+
+def test_silent_unit_does_not_block_others(fake_client):
+    poller = create_poller(fake_client, 3, cycle_deadline=0.6)
+    poller.upses[0].client.silent = True
+    results = list(poller.poll())
+    assert results[0].error is not None
+    for result in results[1:]:
+        assert result.error is None
+        assert [block for block, _ in result.blocks] == [
+            "inventory",
+            "status",
+            "settings",
+            "dynamic",
+            "commands",
+        ]
+
+
+def test_failed_block_is_stale_and_tried_once(fake_client, monkeypatch):
+    monkeypatch.setattr("poller.time.sleep", lambda seconds: None)
+    poller = create_poller(fake_client, 1)
+    client = poller.upses[0].client
+    assert list(poller.poll())[0].stale == []
+
+    client.fail.add(128)
+    client.reads.clear()
+    result = list(poller.poll())[0]
+    assert result.error is None
+    assert [block for block, _ in result.blocks] == [
+        "inventory",
+        "status",
+        "settings",
+        "commands",
+    ]
+    assert result.stale == ["dynamic"]
+    assert client.reads.count(128) == poller.tries
+
+    client.reads.clear()
+    result = list(poller.poll())[0]
+    assert result.stale == ["dynamic"]
+    assert client.reads.count(128) == 1
+
+    client.fail.clear()
+    result = list(poller.poll())[0]
+    assert result.stale == []
+    assert poller.block_failures == {}
+
+
+def test_all_blocks_failed_is_error(fake_client, monkeypatch):
+    monkeypatch.setattr("poller.time.sleep", lambda seconds: None)
+    poller = create_poller(fake_client, 1)
+    list(poller.poll())
+    poller.upses[0].client.fail.update((0, 128, 1024, 1536))
+    result = list(poller.poll())[0]
+    assert result.error is not None
+    assert result.serial_number == "AS0000000001"
+
+
+def test_unknown_blocks_are_probed_again(fake_client, monkeypatch):
+    monkeypatch.setattr("poller.time.sleep", lambda seconds: None)
+    poller = create_poller(fake_client, 1)
+    ups = poller.upses[0]
+    client = ups.client
+    client.illegal.add(1536)
+    client.fail.add(1024)
+    result = list(poller.poll())[0]
+    assert result.stale == ["settings"]
+    assert ups.register_support["blocks"] == ["commands"]
+    assert ups.register_support["unknown"] == ["settings"]
+    # Incomplete result is not shared
+    assert poller.register_support == {}
+
+    client.fail.clear()
+    client.reads.clear()
+    result = list(poller.poll())[0]
+    assert result.stale == []
+    assert [block for block, _ in result.blocks] == [
+        "inventory",
+        "status",
+        "settings",
+        "dynamic",
+    ]
+    # Modbus map and supported blocks are not probed again
+    assert 2048 not in client.reads
+    assert client.reads.count(1024) == 2
+    assert ups.register_support["blocks"] == ["commands"]
+    assert ups.register_support["unknown"] == []
+    assert list(poller.register_support.values()) == [ups.register_support]
+
+    client.reads.clear()
+    list(poller.poll())
+    assert client.reads.count(1024) == 1
+
+
+def test_register_support_shared_by_model_and_firmware(fake_client):
+    poller = create_poller(fake_client, 3)
+    # Second UPS is the same model and firmware as the first one
+    first, second, third = (ups.client for ups in poller.upses)
+    registers = list(first.get_registers())
+    registers[564:572] = second.get_registers()[564:572]
+    second.registers = registers
+    first.illegal.add(1536)
+    second.illegal.add(1536)
+
+    results = list(poller.poll())
+    assert [r.error for r in results] == [None, None, None]
+    assert first.reads.count(2048) == 1
+    assert second.reads.count(2048) == 0
+    assert third.reads.count(2048) == 1
+    assert poller.upses[1].register_support is poller.upses[0].register_support
+    assert poller.upses[1].register_support["blocks"] == ["commands"]
+    assert poller.upses[2].register_support["blocks"] == []
+    assert len(poller.register_support) == 2
+
+    poller.reset()
+    assert poller.register_support == {}
+    assert all(ups.register_support is None for ups in poller.upses)
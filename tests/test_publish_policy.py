@@ -0,0 +1,58 @@
+import pytest
+
+from publish_policy import HeartbeatScheduler, PublishPolicies, PublishPolicy
+
+
+def test_parse_rules():
+    default = PublishPolicy(min_interval=0, max_interval=300, on_change=True)
+    policies = PublishPolicies.parse(
+        "fw_version:max=86400;runtime_*:min=10,max=60;*_countdown:on_change=0",
+        default,
+    )
+    assert policies.get("fw_version") == PublishPolicy(0, 86400, True)
+    assert policies.get("runtime_remaining_s") == PublishPolicy(10, 60, True)
+    assert policies.get("mog_turn_off_countdown") == PublishPolicy(0, 300, False)
+    assert policies.get("state_of_charge_pct") == default
+
+
+def test_parse_empty():
+    default = PublishPolicy()
+    assert PublishPolicies.parse(None, default).get("model") == default
+    assert PublishPolicies.parse(" ; ", default).rules == []
+
+
+def test_parse_unknown_option():
+    with pytest.raises(ValueError):
+        PublishPolicies.parse("model:maximum=10", PublishPolicy())
+
+
+def test_heartbeat_ttl_range():
+    heartbeat = HeartbeatScheduler()
+    for i in range(1000):
+        ttl = heartbeat.ttl(f"AS1/field{i}", 300, now=1000.0 + i * 0.7)
+        assert 0 < ttl <= 300
+
+
+def test_heartbeat_phase_is_stable_per_key():
+    heartbeat = HeartbeatScheduler()
+    # Expiry is at the same phase of the interval, whenever published
+    first = heartbeat.ttl("AS1/model", 300, now=0)
+    for now in range(7, 900, 7):
+        offset = (now + heartbeat.ttl("AS1/model", 300, now) - first) % 300
+        assert min(offset, 300 - offset) == pytest.approx(0, abs=1e-6)
+    assert HeartbeatScheduler().ttl("AS1/model", 300, now=0) == first
+
+
+def test_heartbeat_phases_spread_over_interval():
+    heartbeat = HeartbeatScheduler()
+    # Values published at the same time expire at different times
+    buckets = [0] * 10
+    for i in range(1000):
+        buckets[int(heartbeat.ttl(f"AS{i}/model", 300, now=0) // 30)] += 1
+    assert min(buckets) > 50
+
+
+def test_heartbeat_no_expiry():
+    heartbeat = HeartbeatScheduler()
+    assert heartbeat.ttl("AS1/model", 0) == 0
+    assert heartbeat.ttl("AS1/model", -1) == 0
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from publish_queue import PublishQueue
+
+
+def test_pending_value_is_replaced():
+    published = []
+    collapsed = []
+    queue = PublishQueue(
+        lambda *args: published.append(args), on_collapse=lambda: collapsed.append(1)
+    )
+    assert queue.put("ups/load", "10")
+    assert queue.put("ups/status", "Online", retain=True)
+    assert queue.put("ups/load", "20")
+    assert len(queue) == 2
+    assert len(collapsed) == 1
+    queue.start()
+    queue.stop()
+    assert published == [("ups/load", "20", False), ("ups/status", "Online", True)]
+
+
+def test_messages_without_collapse_are_kept():
+    queue = PublishQueue(lambda *args: None)
+    assert queue.put("ups/events", "a", collapse=False)
+    assert queue.put("ups/events", "b", collapse=False)
+    assert len(queue) == 2
+
+
+def test_put_drops_when_full():
+    queue = PublishQueue(lambda *args: None, maxsize=2, put_timeout=0.01)
+    assert queue.put("ups/a", "1")
+    assert queue.put("ups/b", "1")
+    assert not queue.put("ups/c", "1")
+    # Pending topic is still replaced when the queue is full
+    assert queue.put("ups/a", "2")
+    assert len(queue) == 2
+
+
+def test_put_waits_for_room():
+    released = threading.Event()
+
+    def publish(topic, value, retain):
+        released.wait(5)
+
+    queue = PublishQueue(publish, maxsize=1, batch_size=1, put_timeout=5)
+    queue.put("ups/a", "1")
+    queue.start()
+    threading.Timer(0.05, released.set).start()
+    assert queue.put("ups/b", "1")
+    assert queue.put("ups/c", "1")
+    queue.stop()
+    assert len(queue) == 0
+
+
+def test_put_waits_once_when_full():
+    released = threading.Event()
+
+    def publish(topic, value, retain):
+        released.wait(5)
+
+    queue = PublishQueue(publish, maxsize=1, batch_size=1, put_timeout=0.1)
+    queue.start()
+    queue.put("ups/a", "1")
+    time.sleep(0.05)
+    queue.put("ups/b", "1")
+    start = time.monotonic()
+    assert not queue.put("ups/c", "1")
+    # Broker is stalled, later messages are dropped without waiting
+    for i in range(20):
+        assert not queue.put(f"ups/d{i}", "1")
+    assert time.monotonic() - start < 0.5
+    # Queue drained, put waits for room again
+    released.set()
+    while len(queue):
+        time.sleep(0.01)
+    assert queue.put("ups/e", "1")
+    assert queue.put("ups/f", "1")
+    queue.stop()
+    assert len(queue) == 0
@@ -0,0 +1,23 @@
+from scheduler import FixedRateScheduler
+
+
+def test_first_tick_is_aligned_to_wall_clock():
+    scheduler = FixedRateScheduler(10, lambda: None)
+    assert scheduler.first_tick(now=100.0, wall=1003.0) == 107.0
+    assert scheduler.first_tick(now=100.0, wall=1000.0) == 100.0
+
+
+def test_next_tick_keeps_phase():
+    missed = []
+    scheduler = FixedRateScheduler(10, lambda: None, on_missed=missed.append)
+    # Time spent in the task does not shift the next tick
+    assert scheduler.next_tick(100.0, now=104.0) == 110.0
+    assert missed == []
+
+
+def test_next_tick_skips_missed_ticks():
+    missed = []
+    scheduler = FixedRateScheduler(10, lambda: None, on_missed=missed.append)
+    assert scheduler.next_tick(100.0, now=110.0) == 120.0
+    assert scheduler.next_tick(100.0, now=135.0) == 140.0
+    assert missed == [1, 3]
@@ -0,0 +1,48 @@
+import threading
+
+from single_flight import SingleFlight
+
+
+def start_in_flight(
+    calls: list,
+) -> tuple[SingleFlight, threading.Thread, list, threading.Event]:
+    started = threading.Event()
+    release = threading.Event()
+    joined = []
+
+    def fn(arg):
+        calls.append(arg)
+        if arg == "first":
+            started.set()
+            release.wait(5)
+
+    single_flight = SingleFlight(fn, on_join=lambda: joined.append(1))
+    thread = threading.Thread(target=single_flight.run, args=("first",))
+    thread.start()
+    assert started.wait(5)
+    return single_flight, thread, joined, release
+
+
+def test_request_joins_call_in_flight():
+    calls = []
+    single_flight, thread, joined, release = start_in_flight(calls)
+    assert not single_flight.run("second")
+    release.set()
+    thread.join(5)
+    assert calls == ["first"]
+    assert len(joined) == 1
+    assert single_flight.run("third")
+    assert calls == ["first", "third"]
+
+
+def test_follow_up_runs_after_call_in_flight():
+    calls = []
+    single_flight, thread, joined, release = start_in_flight(calls)
+    assert not single_flight.run("follow-up", follow_up=True)
+    # Follow-up is already queued, so these join it
+    assert not single_flight.run("second", follow_up=True)
+    assert not single_flight.run("third")
+    release.set()
+    thread.join(5)
+    assert calls == ["first", "follow-up"]
+    assert len(joined) == 2
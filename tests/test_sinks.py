@@ -0,0 +1,128 @@
+from dataclasses import asdict
+import io
+import json
+import re
+import time
+
+import pytest
+
+from apcups import ApcUps
+from poller import FIELD_TYPES, format_values
+from shared_state import SharedStateReader, SharedStateSink
+from sinks import (
+    BatchWriter,
+    FileOutput,
+    InfluxLineEncoder,
+    NdjsonEncoder,
+    StreamOutput,
+    UnixSocketOutput,
+    parse_sinks,
+)
+
+
+def test_parse_sinks():
+    sinks = parse_sinks(
+        "influx:unix:/run/telegraf.sock,ndjson:file:/data/ups.ndjson,influx:stdout",
+        measurement="apc",
+        flush_interval=5,
+    )
+    assert all(isinstance(s, BatchWriter) for s in sinks)
+    assert [(type(s.encoder), type(s.output)) for s in sinks] == [
+        (InfluxLineEncoder, UnixSocketOutput),
+        (NdjsonEncoder, FileOutput),
+        (InfluxLineEncoder, StreamOutput),
+    ]
+    assert sinks[0].encoder.measurement == "apc"
+    assert sinks[0].output.path == "/run/telegraf.sock"
+    assert sinks[1].output.filename == "/data/ups.ndjson"
+    assert sinks[0].flush_interval == 5
+
+
+def test_influx_line_encoder():
+    encoder = InfluxLineEncoder(
+        "ups power", {"runtime_s": int, "load_pct": float, "on": bool, "name": str}
+    )
+    line = encoder.encode(
+        "AS 1,a=b",
+        {
+            "runtime_s": "3600",
+            "load_pct": "12.5",
+            "on": "True",
+            "name": "12",
+            "fw version": 'v "1"\\x',
+            "stale": '["dynamic"]',
+        },
+        1.5,
+    )
+    assert line == (
+        r"ups\ power,unit=AS\ 1\,a\=b runtime_s=3600i,load_pct=12.5,on=true,"
+        r'name="12",fw\ version="v \"1\"\\x",stale="[\"dynamic\"]"'
+        " 1500000000\n"
+    )
+
+
+@pytest.mark.parametrize("seed", range(1, 6))
+def test_influx_line_encoder_decoded_data(fake_client, seed):
+    ups = ApcUps("ups", client=fake_client(seed=seed))
+    data = ups.fetch_dynamic_data()
+    values = format_values("AS1", asdict(data))
+    line = InfluxLineEncoder("ups", FIELD_TYPES).encode(
+        "AS1", {key.removeprefix("AS1/"): value for key, value in values.items()}, 1
+    )
+    field_set = re.split(r"(?<!\\) ", line.rstrip("\n"), 1)[1].rsplit(" ", 1)[0]
+    fields = dict(re.findall(r'([^=,]+)=("(?:[^"\\]|\\.)*"|[^,]*)', field_set))
+    assert set(fields) == {key.removeprefix("AS1/") for key in values}
+    assert fields["runtime_remaining_min"] == values["AS1/runtime_remaining_min"]
+    for name, value in fields.items():
+        if FIELD_TYPES[name] is int:
+            assert re.fullmatch(r"-?[0-9]+i", value), name
+        elif FIELD_TYPES[name] is float:
+            assert re.fullmatch(r"-?[0-9]+\.[0-9]+", value), name
+        else:
+            assert value.startswith('"'), name
+    assert re.fullmatch(r"-?[0-9]+i", fields["mog_turn_off_countdown"])
+
+
+def test_ndjson_encoder():
+    line = NdjsonEncoder().encode("AS1", {"runtime_s": "3600"}, 1.5)
+    assert line.endswith("\n")
+    assert json.loads(line) == {"unit": "AS1", "time": 1.5, "runtime_s": "3600"}
+
+
+def test_batch_writer_flushes_on_timer():
+    stream = io.StringIO()
+    sink = BatchWriter(NdjsonEncoder(), StreamOutput(stream), flush_interval=0.05)
+    sink.write("AS1", {"runtime_s": "3600"}, 1.0)
+    sink.flush()
+    sink.write("AS1", {"runtime_s": "3500"}, 2.0)
+    sink.flush()
+    assert len(stream.getvalue().splitlines()) == 1
+    time.sleep(0.2)
+    assert len(stream.getvalue().splitlines()) == 2
+    sink.write("AS1", {"runtime_s": "3400"}, 3.0)
+    sink.close()
+    assert len(stream.getvalue().splitlines()) == 3
+
+
+@pytest.mark.parametrize("spec", ["csv:stdout", "influx:tcp:host", "influx:file:"])
+def test_parse_sinks_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_sinks(spec)
+
+
+def test_shared_state_keeps_values_of_stale_blocks(tmp_path):
+    path = str(tmp_path / "state")
+    sink = SharedStateSink(path, slots=1)
+    sink.write("AS1", {"runtime_remaining_s": "3600", "stale": "[]"}, 1.0)
+    sink.write("AS1", {"ups_status": "['Online']", "stale": '["dynamic"]'}, 2.0)
+    reader = SharedStateReader(path)
+    assert reader.read("AS1") == (
+        2.0,
+        {
+            "runtime_remaining_s": "3600",
+            "ups_status": "['Online']",
+            "stale": '["dynamic"]',
+        },
+    )
+    reader.close()
+    sink.close()
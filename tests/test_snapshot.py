@@ -0,0 +1,107 @@
+import json
+
+import msgpack
+import pytest
+
+from apcups_data import Date, InventoryData, StatusData, UpsStatus
+from snapshot import SnapshotEncoder
+
+INVENTORY_FIELDS = [
+    "fw_version",
+    "model",
+    "sku",
+    "serial_number",
+    "battery_sku",
+    "external_battery_sku",
+    "output_apparent_power_rating",
+    "output_real_power_rating",
+    "sog_relay_config_setting",
+    "manufcturing_date",
+    "output_voltage_ac_setting",
+    "battery_installation_date",
+    "name",
+    "mog_name",
+    "sog0_name",
+    "sog1_name",
+    "sog2_name",
+]
+
+
+def inventory_data() -> InventoryData:
+    return InventoryData(
+        "UPS 15.0",
+        "Smart-UPS 1500",
+        "SMT1500",
+        "AS1",
+        "APCRBC",
+        "",
+        1500,
+        1000,
+        None,
+        Date(8000),
+        None,
+        Date(8001),
+        "ups",
+        "mog",
+        "sog0",
+        "sog1",
+        "sog2",
+    )
+
+
+def test_schema():
+    schema = json.loads(SnapshotEncoder("msgpack").get_schema(InventoryData))
+    assert schema["version"] == 1
+    assert schema["encoding"] == "msgpack"
+    assert schema["block"] == "InventoryData"
+    assert [f["name"] for f in schema["fields"]] == INVENTORY_FIELDS
+    assert schema["fields"][0] == {"name": "fw_version", "type": "str"}
+    assert schema["fields"][6] == {
+        "name": "output_apparent_power_rating",
+        "type": "int",
+    }
+    assert schema["fields"][9] == {
+        "name": "manufcturing_date",
+        "type": "Date",
+        "items": ["raw", "value"],
+    }
+
+
+def test_json_field_order():
+    payload = SnapshotEncoder("json").encode(inventory_data())
+    assert list(json.loads(payload)) == INVENTORY_FIELDS
+    assert payload.startswith('{"fw_version":"UPS 15.0","model":"Smart-UPS 1500",')
+    assert '"manufcturing_date":{"raw":8000,"value":"2021-11-26T00:00:00"}' in payload
+
+
+def test_msgpack_field_order():
+    values = msgpack.unpackb(SnapshotEncoder("msgpack").encode(inventory_data()))
+    assert len(values) == len(INVENTORY_FIELDS)
+    assert values[:8] == [
+        "UPS 15.0",
+        "Smart-UPS 1500",
+        "SMT1500",
+        "AS1",
+        "APCRBC",
+        "",
+        1500,
+        1000,
+    ]
+    assert values[8:12] == [
+        None,
+        [8000, "2021-11-26T00:00:00"],
+        None,
+        [8001, "2021-11-27T00:00:00"],
+    ]
+    assert values[12:] == ["ups", "mog", "sog0", "sog1", "sog2"]
+
+
+def test_msgpack_status_pairs():
+    data = StatusData(None, UpsStatus(1 << 1), *[None] * 13)
+    values = msgpack.unpackb(SnapshotEncoder("msgpack").encode(data))
+    assert values[:2] == [None, [2, ["Online"]]]
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        SnapshotEncoder("cbor")
@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+from tracing import Tracer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("tracing.time.perf_counter", lambda: clock[0])
+    return clock
+
+
+def run_cycle(tracer: Tracer, clock: list, name: str = "update") -> None:
+    with tracer.cycle(name, trigger_source="INTERNAL"):
+        clock[0] += 0.001
+        with tracer.span("fetch"):
+            clock[0] += 0.002
+            with tracer.span("read"):
+                clock[0] += 0.003
+            with tracer.span("decode"):
+                clock[0] += 0.004
+        with tracer.span("publish"):
+            clock[0] += 0.005
+
+
+def test_nested_spans(clock):
+    tracer = Tracer()
+    run_cycle(tracer, clock)
+    trace = tracer.get_traces()[0]
+    assert trace["name"] == "update"
+    assert trace["attrs"] == {"trigger_source": "INTERNAL"}
+    assert trace["duration_ms"] == 15
+    assert [
+        (s["name"], s["depth"], s["parent"], s["start_ms"], s["duration_ms"])
+        for s in trace["spans"]
+    ] == [
+        ("fetch", 0, None, 1, 9),
+        ("read", 1, 0, 3, 3),
+        ("decode", 1, 0, 6, 4),
+        ("publish", 0, None, 10, 5),
+    ]
+    assert [s["self_ms"] for s in trace["spans"]] == [2, 3, 4, 5]
+
+
+def test_span_outside_cycle_is_ignored(clock):
+    tracer = Tracer()
+    with tracer.span("fetch"):
+        pass
+    assert tracer.get_traces() == []
+
+
+def test_ring_is_bounded(clock):
+    tracer = Tracer(max_traces=2)
+    for name in ("a", "b", "c"):
+        run_cycle(tracer, clock, name)
+    assert [t["name"] for t in tracer.get_traces()] == ["b", "c"]
+    assert [t["name"] for t in tracer.get_traces(1)] == ["c"]
+
+    tracer = Tracer(max_traces=0)
+    run_cycle(tracer, clock)
+    assert tracer.get_traces() == []
+
+
+def test_spans_of_other_threads_are_ignored(clock):
+    tracer = Tracer()
+
+    def publish():
+        with tracer.span("publish"):
+            pass
+
+    with tracer.cycle("update"):
+        with tracer.span("fetch"):
+            thread = threading.Thread(target=publish)
+            thread.start()
+            thread.join()
+    assert [s["name"] for s in tracer.get_traces()[0]["spans"]] == ["fetch"]
+
+
+def test_chrome_trace(clock):
+    tracer = Tracer()
+    run_cycle(tracer, clock)
+    run_cycle(tracer, clock)
+    chrome = tracer.to_chrome_trace()
+    assert chrome["displayTimeUnit"] == "ms"
+    events = chrome["traceEvents"]
+    assert len(events) == 10
+    for event in events:
+        assert event["ph"] == "X"
+        assert event["pid"] == event["tid"] == 1
+    assert events[0]["name"] == "update"
+    assert events[0]["ts"] == 0
+    assert events[0]["dur"] == 15000
+    assert events[0]["args"]["trigger_source"] == "INTERNAL"
+    assert (events[2]["name"], events[2]["ts"], events[2]["dur"]) == (
+        "read",
+        3000,
+        3000,
+    )
+    # Cycles are laid out one after another with a 1 ms gap
+    assert events[5]["ts"] == 16000
+    assert events[6]["ts"] == 17000